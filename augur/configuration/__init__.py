@@ -15,4 +15,4 @@
 #   You should have received a copy of the GNU General Public License
 #   along with Augur. If not, see <http://www.gnu.org/licenses/>.
 
-__all__ = ["blacklist", "configure", "load"]
+__all__ = ["binaryCache", "blacklist", "configure", "history", "load", "snapshots"]
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import mmap
+
+from collections.abc import Mapping
+from os import replace
+from struct import Struct
+
+# Every cache starts with the magic, the format version and the entry count
+_magic = b"AUGC"
+formatVersion = 1
+_headerStruct = Struct("<4sII")
+
+# Every entry is the offset and length of its name and of its version
+_entryStruct = Struct("<IIII")
+
+
+class BinaryCache(Mapping):
+    """
+    Read only view of a binary cache of AUR packages and versions, as written
+    by ``writeBinaryCache()``. The file is memory mapped rather than read, and
+    packages are looked up with a binary search over the sorted names, so only
+    the entries that are actually looked up are ever touched. Behaves like a
+    read only dictionary of the packages and versions.
+
+    The file is made up of a header, the table of entries sorted by package
+    name, and then all of the names and versions as UTF-8::
+
+        header  : magic "AUGC", format version, entry count
+        entries : name offset, name length, version offset, version length
+        strings : names and versions, offsets are from the start of strings
+
+    Parameters
+    ----------
+    cacheFile : str
+        Full path to the binary cache.
+
+    Raises
+    ------
+    ValueError
+        If the file isn't a binary cache, or was written by another version
+        of the format.
+
+    """
+
+    def __init__(self, cacheFile):
+        with open(cacheFile, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._readHeader()
+        except ValueError:
+            self.map.close()
+            raise
+
+    def _readHeader(self):
+        if len(self.map) < _headerStruct.size:
+            raise ValueError("Cache is truncated")
+        magic, version, self.count = _headerStruct.unpack_from(self.map, 0)
+        if magic != _magic:
+            raise ValueError("Not a binary cache")
+        if version != formatVersion:
+            raise ValueError("Cache format version %(version)s is not supported" % locals())
+
+        self.strings = _headerStruct.size + self.count * _entryStruct.size
+        if len(self.map) < self.strings:
+            raise ValueError("Cache is truncated")
+
+    def _entry(self, index):
+        # Read the name and version offsets of an entry
+        return _entryStruct.unpack_from(self.map, _headerStruct.size + index * _entryStruct.size)
+
+    def _string(self, offset, length):
+        start = self.strings + offset
+        return self.map[start:start + length]
+
+    def _find(self, name):
+        # Binary search for the entry of a package
+        key = name.encode("utf-8")
+        low = 0
+        high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            nameOffset, nameLength, versionOffset, versionLength = self._entry(middle)
+            current = self._string(nameOffset, nameLength)
+            if current < key:
+                low = middle + 1
+            elif current > key:
+                high = middle
+            else:
+                return versionOffset, versionLength
+
+        return None
+
+    def __getitem__(self, name):
+        found = self._find(name)
+        if found is None:
+            raise KeyError(name)
+
+        return self._string(*found).decode("utf-8")
+
+    def __contains__(self, name):
+        return self._find(name) is not None
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for index in range(self.count):
+            nameOffset, nameLength, versionOffset, versionLength = self._entry(index)
+            yield self._string(nameOffset, nameLength).decode("utf-8")
+
+    def items(self):
+        """
+        Walk every package and version in the cache, in order of name. Faster
+        than looking every package up on its own.
+
+        Yields
+        ------
+        tuple
+            The name and version of each package.
+
+        """
+        for index in range(self.count):
+            nameOffset, nameLength, versionOffset, versionLength = self._entry(index)
+            yield (self._string(nameOffset, nameLength).decode("utf-8"),
+                   self._string(versionOffset, versionLength).decode("utf-8"))
+
+    def close(self):
+        """
+        Unmap the cache. It can't be used after it's closed.
+
+        """
+        self.map.close()
+
+
+def writeBinaryCache(packages, cacheFile):
+    """
+    Write a dictionary of packages and versions as a binary cache that can be
+    read with ``BinaryCache``. The cache is written to a temporary file first,
+    and then moved into place.
+
+    Parameters
+    ----------
+    packages : dict
+        Dictionary with the names of the packages as keys, and their versions
+        as values.
+    cacheFile : str
+        Full path to the binary cache.
+
+    """
+    entries = sorted((str(name).encode("utf-8"), str(version).encode("utf-8")) for name, version in packages.items())
+
+    table = bytearray(_headerStruct.pack(_magic, formatVersion, len(entries)))
+    strings = bytearray()
+    for name, version in entries:
+        nameOffset = len(strings)
+        strings += name
+        versionOffset = len(strings)
+        strings += version
+        table += _entryStruct.pack(nameOffset, len(name), versionOffset, len(version))
+
+    with open("%(cacheFile)s.tmp" % locals(), "wb") as file:
+        file.write(table)
+        file.write(strings)
+    replace("%(cacheFile)s.tmp" % locals(), cacheFile)
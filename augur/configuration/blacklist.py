@@ -17,25 +17,117 @@
 #   You should have received a copy of the GNU General Public License
 #   along with Augur. If not, see <http://www.gnu.org/licenses/>.
 
-from os import path
+import re
+
+from fcntl import flock, LOCK_EX
+from fnmatch import translate
+from os import fsync, makedirs, path, replace
+from sys import stdin
 from yaml import load, dump, CDumper as Dumper, CLoader as Loader
 
 from augur.configuration import configure
+from augur.parser import version
+
+
+class BlacklistMatcher:
+    """
+    Compiled form of the rules in the blacklist, so every package can be
+    checked against all of them at once. Every rule is one of the following::
+
+        package            exact package name
+        python-*           glob, matched against the whole name
+        re:^python2?-.*$   regular expression, after the "re:" prefix
+        package<=1.2.3-1   pin, ignore the package up to this AUR version
+
+    Exact names go in a set, and every glob is joined into a single pattern,
+    so checking a name costs one lookup and one match no matter how many of
+    them there are. Regular expressions are compiled one by one instead, as
+    joining them would renumber their backreferences and let inline flags
+    like ``(?i)`` of one rule apply to the others.
+
+    Parameters
+    ----------
+    rules : list
+        The rules from the ``"blacklist"`` list of the blacklist.
+
+    Raises
+    ------
+    re.error
+        If one of the regular expressions can't be compiled.
+
+    """
+
+    def __init__(self, rules):
+        self.exact = set()
+        self.pins = {}
+        self.regexes = []
+        patterns = []
+
+        for rule in rules:
+            rule = str(rule)
+            if rule.startswith("re:"):
+                self.regexes.append(re.compile(rule[3:]))
+            elif "<=" in rule:
+                name, pin = rule.split("<=", 1)
+                self.pins[name.strip()] = pin.strip()
+            elif any(char in rule for char in "*?["):
+                # Drop the end anchor translate adds, fullmatch does the same
+                patterns.append(translate(rule).replace(r"\Z", ""))
+            else:
+                self.exact.add(rule)
+
+        self.pattern = None
+        if patterns:
+            self.pattern = re.compile("|".join("(?:%s)" % pattern for pattern in patterns))
+
+    def matches(self, package, aurVersion=None):
+        """
+        Check whether a package is blacklisted.
+
+        Parameters
+        ----------
+        package : str
+            Name of the package.
+        aurVersion : str, optional
+            Version of the package in the AUR, used to check pins. Pins are
+            ignored if it's not given.
+
+        Returns
+        -------
+        bool
+            True if the package is blacklisted, otherwise False.
+
+        """
+        if package in self.exact:
+            return True
+        if self.pattern and self.pattern.fullmatch(package):
+            return True
+        if any(regex.fullmatch(package) for regex in self.regexes):
+            return True
+        if aurVersion is not None and package in self.pins:
+            return version.vercmp(aurVersion, self.pins[package]) <= 0
+        return False
+
+    def __contains__(self, package):
+        return self.matches(package)
 
 
 def readBlacklist():
     """
     Read the blacklist file and return a dictionary of the packages. The
-    dictionary only contains one key, ``"blacklist"``. This function uses
-    CLoader as opposed to PyYAML's default Loader.
+    dictionary contains the ``"blacklist"`` key with the rules as they are in
+    the file, and the ``"matcher"`` key with the rules compiled into a
+    ``BlacklistMatcher``. This function uses CLoader as opposed to PyYAML's
+    default Loader.
 
     Returns
     -------
     dict
         A dictionary containing the list of packages that are blacklisted. The
-        dictionary only contains one key, ``"blacklist"`` which contains the
-        actual dictionary. This is done on purpose so it will easier in the
-        future to expand upon the code and add other types of blacklists.
+        ``"blacklist"`` key contains the actual list of rules. This is done on
+        purpose so it will easier in the future to expand upon the code and add
+        other types of blacklists. The ``"matcher"`` key contains the compiled
+        rules, which should be used to check packages against.
 
     """
     # Load xdg config path
@@ -64,46 +156,182 @@ def readBlacklist():
             print("=> Error! Global blacklist found but not readable.")
     elif not path.isfile("/etc/augur/blacklist.yaml") and not blacklistPacks:
         print("=> Error! No global or local blacklist found.")
-        blacklistPacks["blacklist"] = []
+
+    blacklistPacks = blacklistPacks or {}
+    blacklistPacks["blacklist"] = blacklistPacks.get("blacklist") or []
+
+    # Compile the rules once, rather than for every package
+    try:
+        blacklistPacks["matcher"] = BlacklistMatcher(blacklistPacks["blacklist"])
+    except re.error as e:
+        rule = e.pattern
+        print("=> Error! Blacklist contains an invalid regular expression re:%(rule)s: %(e)s" % locals())
+        exit(1)
 
     return blacklistPacks
 
 
-def addBlacklist(package):
+def readPackageList(packages):
     """
-    Add a package to the list of blacklisted packages. This will open and load
-    the local blacklist file with yaml, append the package to list, and then
-    dump it back. It's worth noting that CDumper is used rather than the default
-    PyYAML dumper. This function will exit the program if it could not write to
-    the blacklist, or if the package was already blacklisted.
+    Expand the packages given on the command line into a list of packages.
+    Every argument is either a package, ``-`` to read packages from stdin, or
+    a path prefixed with ``@`` to read packages from a file. Lists are read one
+    package per line, ignoring empty lines and lines starting with ``#``.
 
     Parameters
     ----------
-    package : str
-        Name of the package to be blacklisted. Must be the exact package name as
-        defined in the package's PKGBUILD ``pkgname`` variable.
+    packages : list
+        The arguments given on the command line.
+
+    Returns
+    -------
+    list
+        The packages in the order given, without duplicates.
 
     """
-    configPath = configure.loadXDGVars()["xdgConfig"]
+    expanded = []
+    seen = set()
+    for package in packages:
+        if package == "-":
+            lines = stdin.read().splitlines()
+        elif package.startswith("@"):
+            listFile = package[1:]
+            try:
+                with open(listFile, "r") as file:
+                    lines = file.read().splitlines()
+            except IOError as e:
+                print("=> Error! Could not read package list %(listFile)s." % locals())
+                exit(1)
+        else:
+            lines = [package]
+
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith("#") and line not in seen:
+                seen.add(line)
+                expanded.append(line)
+
+    return expanded
+
+
+def editBlacklist(add=(), remove=()):
+    """
+    Add and remove packages from the local blacklist in a single
+    read-modify-write. An exclusive lock is held on ``blacklist.lock`` next to
+    the blacklist for the whole edit, so concurrent edits can't lose updates,
+    and the new blacklist is written to a temporary file which then replaces
+    the old one, so readers never see a partial file. Packages that are
+    already blacklisted, or not blacklisted when removing, are skipped. Only
+    the ``"blacklist"`` key is changed, any other keys in the file are written
+    back as they were. This function will exit the program if it could not
+    write to the blacklist, or if one of the new rules is invalid.
 
-    # Load the current blacklist information
-    blacklistPacks = readBlacklist()
+    Parameters
+    ----------
+    add : list, optional
+        Packages or rules to be blacklisted.
+    remove : list, optional
+        Packages or rules to be removed from the blacklist.
 
-    # Do some quick error proofing
-    if package in blacklistPacks["blacklist"]:
-        print("=> Error! Package already blacklisted.")
-        exit(1)
+    Returns
+    -------
+    tuple
+        The lists of packages that were added and removed.
+
+    """
+    configPath = configure.loadXDGVars()["xdgConfig"]
+    blacklistDir = "%(configPath)s/augur" % locals()
+    blacklistFile = "%(blacklistDir)s/blacklist.yaml" % locals()
 
-    # Write the new information if it is safe
     try:
-        with open("%(configPath)s/augur/blacklist.yaml" % locals(), "w+") as file:
-            blacklistPacks["blacklist"].append(package)
-            dump(blacklistPacks, file, encoding="utf-8", Dumper=Dumper)
-    except IOError as e:
-        print("=> Error! Could not write to blacklist.")
+        makedirs(blacklistDir, exist_ok=True)
+        lockFile = open("%(blacklistDir)s/blacklist.lock" % locals(), "a")
+    except OSError as e:
+        print("=> Error! Could not lock the blacklist.")
+        exit(1)
+
+    with lockFile:
+        flock(lockFile, LOCK_EX)
+
+        # Load the current blacklist information while holding the lock
+        document = readBlacklist()
+        del document["matcher"]
+        blacklistPacks = document["blacklist"]
+
+        # Check membership against a set, the list keeps the order of the file
+        blacklisted = set(blacklistPacks)
+
+        added = []
+        for package in add:
+            if package in blacklisted:
+                print("=> Error! %(package)s already blacklisted." % locals())
+            else:
+                blacklisted.add(package)
+                blacklistPacks.append(package)
+                added.append(package)
+
+        removed = []
+        for package in remove:
+            if package not in blacklisted:
+                print("=> Error! %(package)s not blacklisted." % locals())
+            else:
+                blacklisted.remove(package)
+                removed.append(package)
+
+        if removed:
+            blacklistPacks[:] = [package for package in blacklistPacks if package in blacklisted]
+
+        if not added and not removed:
+            return added, removed
+
+        # Make sure the new rules compile before they are written
+        try:
+            BlacklistMatcher(blacklistPacks)
+        except re.error as e:
+            print("=> Error! Invalid regular expression in blacklist: %(e)s" % locals())
+            exit(1)
+
+        # Write the new information if it is safe
+        tmpFile = "%(blacklistFile)s.tmp" % locals()
+        try:
+            with open(tmpFile, "w") as file:
+                dump(document, file, encoding="utf-8", Dumper=Dumper)
+                file.flush()
+                fsync(file.fileno())
+            replace(tmpFile, blacklistFile)
+        except IOError as e:
+            print("=> Error! Could not write to blacklist.")
+            exit(1)
+
+    return added, removed
+
+
+def addBlacklist(packages):
+    """
+    Add packages to the list of blacklisted packages. This will add all the
+    packages with a single ``editBlacklist()``, so the blacklist is only read
+    and written once no matter how many packages are given. It's worth noting
+    that CDumper is used rather than the default PyYAML dumper. This function
+    will exit the program if it could not write to the blacklist, or if none of
+    the packages could be blacklisted.
+
+    Parameters
+    ----------
+    packages : list or str
+        Names of the packages to be blacklisted. Must be the exact package names
+        as defined in the package's PKGBUILD ``pkgname`` variable, or one of the
+        patterns or pins described in ``BlacklistMatcher``.
+
+    """
+    if isinstance(packages, str):
+        packages = [packages]
+
+    added, removed = editBlacklist(add=packages)
+    if not added:
         exit(1)
 
-    print("=> Added %(package)s to blacklist" % locals())
+    for package in added:
+        print("=> Added %(package)s to blacklist" % locals())
 
 
 def printBlacklist():
@@ -132,38 +360,27 @@ def printBlacklist():
     return True
 
 
-def whitelist(package):
+def whitelist(packages):
     """
-    Remove a package from the blacklist, or "whitelist" the package. This will
-    read the blacklist using the ``readBlacklist()`` function, and then attempt
-    to remove the specified package from the blacklist. The program will be
-    exited if the package is not in the blacklist, or if the blacklist is
-    unreadable.
+    Remove packages from the blacklist, or "whitelist" the packages. This will
+    remove all the packages with a single ``editBlacklist()``. The program will
+    be exited if none of the packages are in the blacklist, or if the blacklist
+    is unwritable.
 
     Parameters
     ----------
-    package : str
-        The package to be whitelisted. Must be the exact package name as
-        defined in the package's PKGBUILD ``pkgname`` variable.
+    packages : list or str
+        The packages to be whitelisted. Must be the exact package names as
+        defined in the package's PKGBUILD ``pkgname`` variable, or the rules as
+        they appear in the blacklist.
 
     """
-    configPath = configure.loadXDGVars()["xdgConfig"]
-
-    # Load the current blacklist information
-    blacklistPacks = readBlacklist()
+    if isinstance(packages, str):
+        packages = [packages]
 
-    # Do some quick error proofing
-    if package not in blacklistPacks["blacklist"]:
-        print("=> Error! Package not blacklisted")
-        exit(1)
-
-    # Write the new information if it is safe
-    try:
-        with open("%(configPath)s/augur/blacklist.yaml" % locals(), "w+") as file:
-            blacklistPacks["blacklist"].remove(package)
-            dump(blacklistPacks, file, encoding="utf-8", Dumper=Dumper)
-    except IOError as e:
-        print("=> Error! Could not write to blacklist.")
+    added, removed = editBlacklist(remove=packages)
+    if not removed:
         exit(1)
 
-    print("=> Whitelisted %(package)s" % locals())
+    for package in removed:
+        print("=> Whitelisted %(package)s" % locals())
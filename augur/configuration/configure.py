@@ -18,7 +18,7 @@
 #   along with Augur. If not, see <http://www.gnu.org/licenses/>.
 
 from os import environ, path, makedirs
-from yaml import load
+from yaml import load, CLoader as Loader
 
 
 def loadXDGVars():
@@ -79,6 +79,7 @@ def loadConfiguration():
     files. First, attempt to load them from a local user defined file, but if
     not available then the settings will be loaded from the global file. This
     function will exit if unable load both a local and global configuration file.
+    Uses CLoader as opposed to PyYAML's default Loader.
 
     Returns
     -------
@@ -95,7 +96,7 @@ def loadConfiguration():
     if path.isfile("%(xdgConfig)s/augur/configuration.yaml" % locals()):
         try:
             with open("%(xdgConfig)s/augur/configuration.yaml" % locals(), "r") as file:
-                configFile = load(file)
+                configFile = load(file, Loader=Loader)
         except IOError as e:
             print("=> Error! Local configuration found but not readable, falling back to default")
 
@@ -104,7 +105,7 @@ def loadConfiguration():
         if path.isfile("/etc/augur/configuration.yaml"):
             try:
                 with open("/etc/augur/configuration.yaml") as file:
-                    configFile = load(file)
+                    configFile = load(file, Loader=Loader)
             except IOError as e:
                 print("=> Error! Global configuration found but not readable. Exiting.")
                 exit(1)
@@ -151,7 +152,9 @@ def checkCache(updating):
         makedirs("%(xdgCache)s/augur" % locals())
 
     # Make sure user is alright with writing over current cache
-    if path.isfile("%(xdgCache)s/augur/packages.yaml" % locals()) and updating:
+    cacheExists = path.isfile("%(xdgCache)s/augur/packages.cache" % locals()) or \
+        path.isfile("%(xdgCache)s/augur/packages.yaml" % locals())
+    if cacheExists and updating:
         print("=> There's already a cache present, are you sure you would like to download another one?")
         verify = input("=[y/N]> ")
 
@@ -159,4 +162,4 @@ def checkCache(updating):
             print("=> Exiting...")
             exit(1)
 
-    return "%(xdgCache)s/augur/packages.yaml" % locals()
+    return "%(xdgCache)s/augur/packages.cache" % locals()
@@ -0,0 +1,383 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import sqlite3
+
+from os import makedirs, path
+from time import time
+from yaml import load, CLoader as Loader, YAMLError
+
+from augur.configuration import binaryCache, configure
+
+_schema = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    taken REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshotsSource ON snapshots (source, taken);
+CREATE TABLE IF NOT EXISTS versions (
+    snapshot INTEGER NOT NULL REFERENCES snapshots (id),
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    PRIMARY KEY (snapshot, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS versionsName ON versions (name, snapshot);
+"""
+
+
+def openHistory(historyFile=None):
+    """
+    Open the version history store, creating it if it doesn't exist yet. The
+    store is a SQLite database at ``$XDG_CACHE_HOME/augur/history.sqlite``
+    holding snapshots of the AUR and of every repository. Every snapshot
+    records the version of every package at the time it was taken, indexed by
+    both snapshot and package name. The directory of the store is created if
+    it's missing.
+
+    Parameters
+    ----------
+    historyFile : str, optional
+        Full path to the database, if it shouldn't be the default one.
+
+    Returns
+    -------
+    sqlite3.Connection
+        Connection to the version history store.
+
+    """
+    if not historyFile:
+        xdgCache = configure.loadXDGVars()["xdgCache"]
+        historyFile = "%(xdgCache)s/augur/history.sqlite" % locals()
+
+    makedirs(path.dirname(historyFile), exist_ok=True)
+    connection = sqlite3.connect(historyFile)
+    connection.executescript(_schema)
+
+    return connection
+
+
+def recordSnapshot(connection, source, packages, taken=None):
+    """
+    Record the versions of every package from one source as a new snapshot.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Connection to the version history store, from ``openHistory()``.
+    source : str
+        What the snapshot is of, ``"aur"`` for the AUR, otherwise the name of
+        the repository.
+    packages : Mapping
+        Dictionary with the names of the packages as keys, and their versions
+        as values.
+    taken : float, optional
+        When the snapshot was taken in seconds since the epoch, now if not set.
+
+    Returns
+    -------
+    int
+        The id of the new snapshot.
+
+    """
+    with connection:
+        snapshot = connection.execute("INSERT INTO snapshots (source, taken) VALUES (?, ?)",
+                                      (source, taken or time())).lastrowid
+        connection.executemany("INSERT OR REPLACE INTO versions (snapshot, name, version) VALUES (?, ?, ?)",
+                               ((snapshot, name, str(version)) for name, version in packages.items()))
+
+    return snapshot
+
+
+def recordChanges(connection, source, packages, taken=None):
+    """
+    Record the versions of every package from one source as a new snapshot,
+    but only if they differ from the newest snapshot of the source, so
+    checking an unchanged repository doesn't grow the store.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Connection to the version history store, from ``openHistory()``.
+    source : str
+        What the snapshot is of, see ``recordSnapshot()``.
+    packages : Mapping
+        Dictionary with the names of the packages as keys, and their versions
+        as values.
+    taken : float, optional
+        When the snapshot was taken in seconds since the epoch, now if not set.
+
+    Returns
+    -------
+    int
+        The id of the new snapshot, or of the newest one if nothing changed.
+
+    """
+    snapshot = latestSnapshot(connection, source)
+    if snapshot is not None:
+        recorded = dict(connection.execute("SELECT name, version FROM versions WHERE snapshot = ?", (snapshot,)))
+        if recorded == {name: str(version) for name, version in packages.items()}:
+            return snapshot
+
+    return recordSnapshot(connection, source, packages, taken)
+
+
+def pruneHistory(connection, before):
+    """
+    Remove the snapshots taken before a given time. The newest snapshot of
+    every source taken at or before ``before`` is kept, so there's still
+    something to compare against with ``changesSince()``.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Connection to the version history store, from ``openHistory()``.
+    before : float
+        Remove snapshots taken before this time, in seconds since the epoch.
+
+    Returns
+    -------
+    int
+        The number of snapshots removed.
+
+    """
+    with connection:
+        snapshots = connection.execute("""
+            SELECT id FROM snapshots AS old
+            WHERE taken < (
+                SELECT MAX(taken) FROM snapshots AS kept WHERE kept.source = old.source AND kept.taken <= ?)""",
+                                       (before,)).fetchall()
+        connection.executemany("DELETE FROM versions WHERE snapshot = ?", snapshots)
+        connection.executemany("DELETE FROM snapshots WHERE id = ?", snapshots)
+
+    return len(snapshots)
+
+
+def recordCache(connection, cacheFile, packages, source="aur"):
+    """
+    Record a cache as a snapshot taken at the time the cache was last
+    modified, unless there's already a snapshot of the source at least as new.
+    Updating records a snapshot of every new cache, so this only records one
+    when a cache was updated while the history was turned off.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Connection to the version history store, from ``openHistory()``.
+    cacheFile : str
+        Full path to the cache the packages were loaded from.
+    packages : Mapping
+        Dictionary with the names of the packages in the cache as keys, and
+        their versions as values.
+    source : str, optional
+        What the cache is of, see ``recordSnapshot()``.
+
+    Returns
+    -------
+    int
+        The id of the new snapshot, or None if there already is a newer one.
+
+    """
+    taken = path.getmtime(cacheFile)
+    newest = connection.execute("SELECT MAX(taken) FROM snapshots WHERE source = ?", (source,)).fetchone()[0]
+    if newest is not None and newest >= taken:
+        return None
+
+    return recordSnapshot(connection, source, packages, taken)
+
+
+def latestSnapshot(connection, source, before=None):
+    """
+    Find the newest snapshot of a source.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Connection to the version history store, from ``openHistory()``.
+    source : str
+        What the snapshot is of, see ``recordSnapshot()``.
+    before : float, optional
+        Only look at snapshots taken at or before this time, in seconds since
+        the epoch.
+
+    Returns
+    -------
+    int
+        The id of the snapshot, or None if there isn't one.
+
+    """
+    row = connection.execute("SELECT id FROM snapshots WHERE source = ? AND taken <= ? ORDER BY taken DESC LIMIT 1",
+                             (source, time() if before is None else before)).fetchone()
+
+    return row[0] if row else None
+
+
+def checkVersions(connection, repo):
+    """
+    Find every package of a repository whose version differs from the AUR's,
+    as a join of the newest snapshots of the two. The join looks up every
+    package of the repository in the AUR snapshot by its primary key, so only
+    the packages in both, with different version strings, are ever returned,
+    ready to be compared.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Connection to the version history store, from ``openHistory()``.
+    repo : str
+        The name of the repository, as used with ``recordSnapshot()``.
+
+    Returns
+    -------
+    list
+        List of ``(name, winry, aur)`` tuples of the package name, and its
+        version in the repository and in the AUR.
+
+    """
+    repoSnapshot = latestSnapshot(connection, repo)
+    aurSnapshot = latestSnapshot(connection, "aur")
+    if repoSnapshot is None or aurSnapshot is None:
+        return []
+
+    return connection.execute("""
+        SELECT winry.name, winry.version, aur.version
+        FROM versions AS winry
+        JOIN versions AS aur ON aur.snapshot = ? AND aur.name = winry.name
+        WHERE winry.snapshot = ? AND winry.version != aur.version
+        ORDER BY winry.name""", (aurSnapshot, repoSnapshot)).fetchall()
+
+
+def changesSince(connection, source, since):
+    """
+    Find what changed in a source between the newest snapshot and the newest
+    one taken at or before ``since``.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Connection to the version history store, from ``openHistory()``.
+    source : str
+        What the snapshots are of, see ``recordSnapshot()``.
+    since : float
+        The time to compare against, in seconds since the epoch.
+
+    Returns
+    -------
+    list
+        List of ``(name, old, new)`` tuples of the package name with its old
+        and new version. The old version is None for added packages, and the
+        new version is None for removed ones. None if there aren't snapshots
+        to compare.
+
+    """
+    newSnapshot = latestSnapshot(connection, source)
+    oldSnapshot = latestSnapshot(connection, source, since)
+    if newSnapshot is None or oldSnapshot is None:
+        return None
+
+    return connection.execute("""
+        SELECT new.name, old.version, new.version
+        FROM versions AS new
+        LEFT JOIN versions AS old ON old.snapshot = :old AND old.name = new.name
+        WHERE new.snapshot = :new AND (old.version IS NULL OR old.version != new.version)
+        UNION ALL
+        SELECT old.name, old.version, NULL
+        FROM versions AS old
+        WHERE old.snapshot = :old AND NOT EXISTS (
+            SELECT 1 FROM versions AS new WHERE new.snapshot = :new AND new.name = old.name)
+        ORDER BY 1""", {"old": oldSnapshot, "new": newSnapshot}).fetchall()
+
+
+def importCache(connection, cacheFile, source="aur"):
+    """
+    Import an existing cache of AUR packages as a snapshot, taken at the time
+    the cache was last modified. Both the binary caches and the older
+    ``packages.yaml`` caches can be imported. Uses CLoader as opposed to
+    PyYAML's default Loader.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Connection to the version history store, from ``openHistory()``.
+    cacheFile : str
+        Full path to the cache to import.
+    source : str, optional
+        What the cache is of, see ``recordSnapshot()``.
+
+    Returns
+    -------
+    int
+        The id of the new snapshot, or None if the cache couldn't be read.
+
+    """
+    try:
+        try:
+            packages = binaryCache.BinaryCache(cacheFile)
+        except ValueError:
+            with open(cacheFile, "r") as file:
+                packages = load(file, Loader=Loader) or {}
+
+        try:
+            return recordSnapshot(connection, source, packages, path.getmtime(cacheFile))
+        finally:
+            if isinstance(packages, binaryCache.BinaryCache):
+                packages.close()
+    except (IOError, OSError, YAMLError) as e:
+        print("=> Error! Could not read the cache %(cacheFile)s." % locals())
+        return None
+
+
+def printChanges(connection, source, hours):
+    """
+    Print what changed in a source over the last ``hours`` hours, as found by
+    ``changesSince()``.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Connection to the version history store, from ``openHistory()``.
+    source : str
+        What the snapshots are of, see ``recordSnapshot()``.
+    hours : float
+        How many hours back to look.
+
+    Returns
+    -------
+    bool
+        True if anything changed, otherwise False.
+
+    """
+    changes = changesSince(connection, source, time() - hours * 3600)
+    if changes is None:
+        print("=> Error! Not enough history to compare, enable History and update first.")
+        return False
+
+    if not changes:
+        print("=> Nothing changed in the last %(hours)s hours." % locals())
+        return False
+
+    print("=> Changed in the last %(hours)s hours:" % locals())
+    for name, old, new in changes:
+        if old is None:
+            print("    => Added: %(name)s %(new)s" % locals())
+        elif new is None:
+            print("    => Removed: %(name)s %(old)s" % locals())
+        else:
+            print("    => %(name)s: %(old)s -> %(new)s" % locals())
+    return True
@@ -17,38 +17,80 @@
 #   You should have received a copy of the GNU General Public License
 #   along with Augur. If not, see <http://www.gnu.org/licenses/>.
 
-from os import path
+from os import path, remove
 from yaml import load, CLoader as Loader
 
-from augur.configuration import configure
+from augur.configuration import binaryCache, configure
+
+
+def migrateYamlCache(yamlFile, cacheFile):
+    """
+    Convert a cache from the old YAML format into a binary cache, and remove
+    the YAML file once it's converted. Uses CLoader as opposed to PyYAML's
+    default Loader.
+
+    Parameters
+    ----------
+    yamlFile : str
+        Full path to the old ``packages.yaml`` cache.
+    cacheFile : str
+        Full path to the binary cache to be written.
+
+    Returns
+    -------
+    bool
+        True if the cache was converted, otherwise False.
+
+    """
+    print("=> Converting cache to the binary format")
+
+    try:
+        with open(yamlFile, "r") as file:
+            packages = load(file, Loader=Loader) or {}
+        binaryCache.writeBinaryCache(packages, cacheFile)
+        remove(yamlFile)
+    except (IOError, OSError) as e:
+        print("=> Error! Could not convert the cache.")
+        return False
+
+    return True
 
 
 def loadAurCache():
     """
-    Read and load the cache of AUR packages. Uses CLoader as opposed to PyYAML's
-    default Loader. Function will exit if it cannot read the cache.
+    Read and load the cache of AUR packages. The cache is memory mapped with
+    ``binaryCache.BinaryCache`` rather than read in full, so only the packages
+    that are looked up are ever read. A cache in the old YAML format is
+    converted with ``migrateYamlCache()`` first. Function will exit if it cannot
+    read the cache.
 
     Returns
     -------
-    dict
-        YAML loaded dictionary of packages from the cache.
+    Mapping
+        Read only dictionary of packages from the cache, with the names of the
+        packages as keys and their versions as values.
 
     """
     print("=> Loading AUR packages from cache")
 
     # Load xdg cache path
     cachePath = configure.loadXDGVars()["xdgCache"]
+    cacheFile = "%(cachePath)s/augur/packages.cache" % locals()
+    yamlFile = "%(cachePath)s/augur/packages.yaml" % locals()
+
+    # Bring an old cache up to date
+    if not path.isfile(cacheFile) and path.isfile(yamlFile):
+        migrateYamlCache(yamlFile, cacheFile)
 
     # Load the packages
     packages = {}
-    if path.isfile("%(cachePath)s/augur/packages.yaml" % locals()):
+    if path.isfile(cacheFile):
         try:
-            with open("%(cachePath)s/augur/packages.yaml" % locals(), "r") as file:
-                packages = load(file, Loader=Loader)
-                if not packages:
-                    print("=> Error! Cache is empty. Please update it (-u).")
-        except IOError as e:
-            print("=> Error! Cache not found. Please update it (-u).")
+            packages = binaryCache.BinaryCache(cacheFile)
+            if not packages:
+                print("=> Error! Cache is empty. Please update it (-u).")
+        except (IOError, ValueError) as e:
+            print("=> Error! Cache not readable. Please update it (-u).")
             exit(1)
 
     return packages
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import gzip
+import json
+
+from os import listdir, makedirs, path, remove, replace
+from time import time
+
+from augur.configuration import configure
+
+
+def snapshotPath():
+    """
+    Find the directory the snapshots of the AUR cache are kept in, at
+    ``$XDG_CACHE_HOME/augur/snapshots``.
+
+    Returns
+    -------
+    str
+        The full path to the snapshot directory.
+
+    """
+    xdgCache = configure.loadXDGVars()["xdgCache"]
+
+    return "%(xdgCache)s/augur/snapshots" % locals()
+
+
+def listSnapshots(snapshotDir):
+    """
+    List the snapshots in the snapshot directory, oldest first. Every snapshot
+    is a gzipped JSON file named after the time it was taken in milliseconds,
+    and is either a ``base`` holding every package, or a ``delta`` holding the
+    changes since the snapshot before it.
+
+    Parameters
+    ----------
+    snapshotDir : str
+        Full path to the snapshot directory.
+
+    Returns
+    -------
+    list
+        List of ``(taken, kind, file)`` tuples, with the time the snapshot was
+        taken in milliseconds since the epoch, whether it's a ``"base"`` or a
+        ``"delta"``, and the full path to it.
+
+    """
+    if not path.isdir(snapshotDir):
+        return []
+
+    snapshots = []
+    for name in listdir(snapshotDir):
+        parts = name.split(".")
+        if len(parts) == 4 and parts[1] in ("base", "delta") and parts[2:] == ["json", "gz"] and parts[0].isdigit():
+            snapshots.append((int(parts[0]), parts[1], path.join(snapshotDir, name)))
+
+    return sorted(snapshots)
+
+
+def _readFile(snapshotFile):
+    with gzip.open(snapshotFile, "rt", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _writeFile(snapshotFile, content):
+    # Write to a temporary file first, so a snapshot is either whole or missing
+    with gzip.open("%(snapshotFile)s.tmp" % locals(), "wt", encoding="utf-8") as file:
+        json.dump(content, file, separators=(",", ":"))
+    replace("%(snapshotFile)s.tmp" % locals(), snapshotFile)
+
+
+def readSnapshot(snapshotDir, at=None):
+    """
+    Rebuild the packages as they were in a snapshot, by loading the newest
+    base at or before it and applying every delta after that base in order.
+
+    Parameters
+    ----------
+    snapshotDir : str
+        Full path to the snapshot directory.
+    at : float, optional
+        Rebuild the newest snapshot taken at or before this time, in seconds
+        since the epoch. The newest snapshot if not set.
+
+    Returns
+    -------
+    dict
+        Dictionary with the names of the packages as keys, and their versions
+        as values. None if there is no snapshot from that time.
+
+    """
+    snapshots = listSnapshots(snapshotDir)
+    if at is not None:
+        snapshots = [snapshot for snapshot in snapshots if snapshot[0] <= at * 1000]
+
+    # Find the base the snapshot builds on
+    bases = [index for index, (taken, kind, snapshotFile) in enumerate(snapshots) if kind == "base"]
+    if not bases:
+        return None
+
+    packages = None
+    for taken, kind, snapshotFile in snapshots[bases[-1]:]:
+        content = _readFile(snapshotFile)
+        if kind == "base":
+            packages = content
+            continue
+
+        for name in content["removed"]:
+            packages.pop(name, None)
+        packages.update(content["added"])
+        packages.update(content["changed"])
+
+    return packages
+
+
+def recordSnapshot(packages, snapshotDir=None, taken=None, rebase=14, keepDays=28):
+    """
+    Record the AUR packages as a new snapshot. Usually only what was added,
+    removed and changed since the last snapshot is written, as a delta. Every
+    ``rebase`` deltas a full base is written instead, so rebuilding a snapshot
+    never has to go through too many deltas. Snapshots older than
+    ``keepDays`` are pruned, along with their base once nothing newer needs
+    it. Every file is compressed, and written to a temporary file before
+    being renamed into place, so a failure never leaves a broken snapshot.
+
+    Parameters
+    ----------
+    packages : Mapping
+        Dictionary with the names of the packages as keys, and their versions
+        as values.
+    snapshotDir : str, optional
+        Full path to the snapshot directory, ``snapshotPath()`` if not set.
+    taken : float, optional
+        When the snapshot was taken in seconds since the epoch, now if not set.
+    rebase : int, optional
+        The number of deltas written before the next base.
+    keepDays : float, optional
+        How many days of snapshots are kept.
+
+    Returns
+    -------
+    str
+        The full path to the new snapshot.
+
+    """
+    snapshotDir = snapshotDir or snapshotPath()
+    makedirs(snapshotDir, exist_ok=True)
+    taken = int((taken or time()) * 1000)
+    packages = {name: str(version) for name, version in packages.items()}
+
+    # Work out whether a delta will do
+    snapshots = listSnapshots(snapshotDir)
+    deltas = 0
+    for previousTaken, kind, snapshotFile in reversed(snapshots):
+        if kind == "base":
+            break
+        deltas += 1
+    previous = readSnapshot(snapshotDir) if snapshots and deltas < rebase else None
+
+    if previous is None:
+        snapshotFile = path.join(snapshotDir, "%013d.base.json.gz" % taken)
+        _writeFile(snapshotFile, packages)
+    else:
+        delta = {
+            "added": {name: version for name, version in packages.items() if name not in previous},
+            "removed": sorted(name for name in previous if name not in packages),
+            "changed": {name: version for name, version in packages.items()
+                        if name in previous and previous[name] != version}}
+        snapshotFile = path.join(snapshotDir, "%013d.delta.json.gz" % taken)
+        _writeFile(snapshotFile, delta)
+
+    pruneSnapshots(snapshotDir, time() - keepDays * 86400)
+
+    return snapshotFile
+
+
+def pruneSnapshots(snapshotDir, before):
+    """
+    Remove the snapshots taken before a given time. A base is only removed
+    along with every delta that builds on it, once a newer base is also older
+    than ``before``, so every snapshot that's kept can still be rebuilt.
+
+    Parameters
+    ----------
+    snapshotDir : str
+        Full path to the snapshot directory.
+    before : float
+        Remove snapshots taken before this time, in seconds since the epoch.
+
+    """
+    snapshots = listSnapshots(snapshotDir)
+
+    # Everything before the newest base that's still too old can go
+    oldBases = [index for index, (taken, kind, snapshotFile) in enumerate(snapshots)
+                if kind == "base" and taken < before * 1000]
+    if not oldBases:
+        return
+
+    for taken, kind, snapshotFile in snapshots[:oldBases[-1]]:
+        remove(snapshotFile)
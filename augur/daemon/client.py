@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import socket
+
+from os import environ
+
+from augur.configuration import configure
+
+
+def socketPath():
+    """
+    Find the path of the daemon's socket. The socket is put in
+    ``$XDG_RUNTIME_DIR`` if it's set, otherwise in the augur cache directory.
+
+    Returns
+    -------
+    str
+        The path of the Unix socket.
+
+    """
+    if environ.get("XDG_RUNTIME_DIR"):
+        runtimeDir = environ["XDG_RUNTIME_DIR"]
+        return "%(runtimeDir)s/augur.sock" % locals()
+
+    xdgCache = configure.loadXDGVars()["xdgCache"]
+    return "%(xdgCache)s/augur/augur.sock" % locals()
+
+
+def sendRequest(request, path=None, timeout=60):
+    """
+    Send a request to the daemon and wait for its response. Requests and
+    responses are single lines of JSON. This function will exit the program if
+    the daemon isn't running.
+
+    Parameters
+    ----------
+    request : dict
+        The request, with the name of the command as ``"command"``. See
+        ``server.AugurDaemon.handle()`` for the commands.
+    path : str, optional
+        Path of the daemon's socket, defaults to ``socketPath()``.
+    timeout : float, optional
+        Seconds to wait for the daemon to answer.
+
+    Returns
+    -------
+    dict
+        The response of the daemon. ``"ok"`` is False if the request failed,
+        with the reason as ``"error"``.
+
+    """
+    path = path or socketPath()
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(timeout)
+            connection.connect(path)
+            connection.sendall(json.dumps(request).encode("utf-8") + b"\n")
+
+            with connection.makefile("rb") as file:
+                response = file.readline()
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        print("=> Error! The augur daemon is not running (%(path)s)." % locals())
+        exit(1)
+    except OSError as e:
+        print("=> Error! Could not talk to the augur daemon: %(e)s" % locals())
+        exit(1)
+
+    if not response:
+        print("=> Error! The augur daemon closed the connection.")
+        exit(1)
+
+    return json.loads(response.decode("utf-8"))
@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import signal
+import socket
+import socketserver
+
+from os import chmod, path, stat, unlink
+from threading import Event, Lock, Thread
+from time import time
+
+from augur.configuration import blacklist, configure, load
+from augur.daemon import client
+from augur.parser import compare, parseRepo
+
+
+def _fileStamp(file):
+    """
+    Get the modification time of a file, or None if it doesn't exist. Used to
+    tell whether a file has to be loaded again.
+    """
+    try:
+        return stat(file).st_mtime_ns
+    except OSError:
+        return None
+
+
+class AugurDaemon:
+    """
+    Keeps the packages of the Winry repositories, the AUR cache and the
+    compiled blacklist in memory, and answers requests about them. Everything
+    is loaded again by ``refresh()``. The databases are downloaded with
+    conditional requests, so they're only parsed again when the mirror has a
+    new copy, and the AUR cache and blacklist are only loaded again when their
+    files have changed. The results of a check are kept until the next refresh
+    changes something.
+
+    Parameters
+    ----------
+    config : dict
+        The configuration, as loaded by ``configure.loadConfiguration()``.
+
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = Lock()
+        self.refreshLock = Lock()
+
+        self.repos = {}
+        self.aur = {}
+        self.blacklist = {"blacklist": []}
+        self.changes = None
+        self.refreshed = None
+
+        self._stamps = {}
+
+    def refresh(self):
+        """
+        Load the repositories, the AUR cache and the blacklist again, and swap
+        them in once they are all loaded. Requests are answered with the old
+        data until then.
+        """
+        with self.refreshLock:
+            config = self.config
+            repos = parseRepo.parseRepos(config["Mirror"], config.get("Repos", [{"Name": "winry-testing"}]),
+                                         config.get("StreamDatabase", False),
+                                         config.get("RepoPath", parseRepo.defaultRepoPath))
+            changed = repos != self.repos
+
+            # Only load the AUR cache again if it was updated
+            cacheFile = configure.checkCache(False)
+            aur = self.aur
+            if _fileStamp(cacheFile) != self._stamps.get("aur") or self.refreshed is None:
+                self._stamps["aur"] = _fileStamp(cacheFile)
+                aur = load.loadAurCache()
+                changed = True
+
+            # Same for the local and global blacklists
+            xdgConfig = configure.loadXDGVars()["xdgConfig"]
+            blacklistStamp = (_fileStamp("%(xdgConfig)s/augur/blacklist.yaml" % locals()),
+                              _fileStamp("/etc/augur/blacklist.yaml"))
+            blacklistPacks = self.blacklist
+            if blacklistStamp != self._stamps.get("blacklist") or self.refreshed is None:
+                self._stamps["blacklist"] = blacklistStamp
+                blacklistPacks = blacklist.readBlacklist()
+                changed = True
+
+            with self.lock:
+                self.repos = repos
+                self.aur = aur
+                self.blacklist = blacklistPacks
+                if changed:
+                    self.changes = None
+                self.refreshed = time()
+
+    def check(self):
+        """
+        Compare the packages of every repository against the AUR with
+        ``compare.compareVersions()``. The result is kept until the data
+        changes.
+
+        Returns
+        -------
+        list
+            The records of all the version changes.
+
+        """
+        with self.lock:
+            if self.changes is None:
+                changes = []
+                for repo in sorted(self.repos):
+                    changes.extend(compare.compareVersions(self.repos[repo], self.aur, self.blacklist,
+                                                           self.config.get("ExternalVercmp", False), 0, repo))
+                self.changes = changes
+
+            return self.changes
+
+    def query(self, packages):
+        """
+        Look up packages in the repositories, the AUR and the blacklist.
+
+        Parameters
+        ----------
+        packages : list
+            Names of the packages.
+
+        Returns
+        -------
+        dict
+            Dictionary with the names of the packages as keys. The values have
+            the AUR version as ``"aur"``, or None, the version in every
+            repository that has the package as ``"repos"``, and whether the
+            package is blacklisted as ``"blacklisted"``.
+
+        """
+        with self.lock:
+            results = {}
+            for package in packages:
+                aurVersion = self.aur.get(package)
+                results[package] = {
+                    "aur": aurVersion,
+                    "repos": {repo: self.repos[repo][package] for repo in sorted(self.repos)
+                              if package in self.repos[repo]},
+                    "blacklisted": self.blacklist["matcher"].matches(package, aurVersion)}
+
+            return results
+
+    def status(self):
+        """
+        Describe the data held by the daemon.
+
+        Returns
+        -------
+        dict
+            The time of the last refresh as ``"refreshed"``, the number of
+            packages in every repository as ``"repos"``, and the number of AUR
+            packages as ``"aur"``.
+
+        """
+        with self.lock:
+            return {"refreshed": self.refreshed,
+                    "repos": {repo: len(self.repos[repo]) for repo in sorted(self.repos)},
+                    "aur": len(self.aur)}
+
+    def handle(self, request):
+        """
+        Answer a request. The command is given as ``"command"``, and is one of
+        the following::
+
+            check     all the version changes, as "changes"
+            query     the packages given as "packages", as "packages"
+            refresh   refresh now, then the same as status
+            status    the result of status()
+
+        Parameters
+        ----------
+        request : dict
+            The request sent by ``client.sendRequest()``.
+
+        Returns
+        -------
+        dict
+            The response, with ``"ok"`` set to True. If the request failed
+            ``"ok"`` is False and the reason is given as ``"error"``.
+
+        """
+        command = request.get("command")
+        if command == "check":
+            return {"ok": True, "changes": self.check()}
+        elif command == "query":
+            return {"ok": True, "packages": self.query(request.get("packages", []))}
+        elif command == "refresh":
+            self.refresh()
+            return dict(self.status(), ok=True)
+        elif command == "status":
+            return dict(self.status(), ok=True)
+
+        return {"ok": False, "error": "Unknown command %r" % (command,)}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """
+    Reads requests from a connection one line at a time, and writes a line
+    with the response to each of them.
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.daemon.handle(json.loads(line.decode("utf-8")))
+            except ValueError as e:
+                response = {"ok": False, "error": "Invalid request: %s" % e}
+            except (Exception, SystemExit) as e:
+                response = {"ok": False, "error": str(e)}
+
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+def _refreshLoop(daemon, interval, stopped):
+    """
+    Refresh the daemon every ``interval`` seconds until ``stopped`` is set. A
+    failed refresh keeps the data from the last one.
+    """
+    while not stopped.wait(interval):
+        print("=> Refreshing")
+        try:
+            daemon.refresh()
+        except (Exception, SystemExit) as e:
+            print("=> Error! Refresh failed, keeping the old data: %(e)s" % locals())
+
+
+def _terminate(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serveDaemon(config, socketFile=None, interval=None):
+    """
+    Load everything once, and then answer requests on a Unix socket until the
+    daemon is interrupted or terminated. The data is refreshed in the
+    background every ``interval`` seconds. This function will exit the program
+    if another daemon is already listening on the socket.
+
+    Parameters
+    ----------
+    config : dict
+        The configuration, as loaded by ``configure.loadConfiguration()``.
+    socketFile : str, optional
+        Path of the socket, defaults to ``client.socketPath()``.
+    interval : float, optional
+        Seconds between refreshes, defaults to the ``DaemonRefresh`` setting.
+
+    """
+    socketFile = socketFile or client.socketPath()
+    if interval is None:
+        interval = config.get("DaemonRefresh", 900)
+
+    # Clean up a socket left behind, unless a daemon is still using it
+    if path.exists(socketFile):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(socketFile)
+                print("=> Error! A daemon is already listening on %(socketFile)s." % locals())
+                exit(1)
+            except OSError:
+                unlink(socketFile)
+
+    print("=> Loading packages")
+    daemon = AugurDaemon(config)
+    daemon.refresh()
+
+    server = socketserver.ThreadingUnixStreamServer(socketFile, _RequestHandler)
+    server.daemon = daemon
+    server.daemon_threads = True
+    chmod(socketFile, 0o600)
+
+    stopped = Event()
+    Thread(target=_refreshLoop, args=(daemon, interval, stopped), daemon=True).start()
+    signal.signal(signal.SIGTERM, _terminate)
+
+    print("=> Listening on %(socketFile)s" % locals())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("=> Stopping")
+    finally:
+        stopped.set()
+        server.server_close()
+        unlink(socketFile)
@@ -0,0 +1,380 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import resource
+
+from collections import defaultdict
+from contextlib import contextmanager
+from os import replace
+from sys import stderr
+from threading import Lock
+from time import perf_counter, time
+
+# Upper bounds of the latency histogram buckets, in seconds
+latencyBuckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_enabled = False
+_lock = Lock()
+_started = None
+_spans = []
+_counters = defaultdict(int)
+_histograms = {}
+
+
+class Histogram:
+    """
+    Counts observations into buckets by their upper bounds, the same way as
+    Prometheus histograms, along with their number and sum.
+
+    Parameters
+    ----------
+    buckets : tuple, optional
+        The upper bounds of the buckets, in ascending order.
+
+    """
+
+    def __init__(self, buckets=latencyBuckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """
+        Add an observation to the histogram.
+
+        Parameters
+        ----------
+        value : float
+            The observed value.
+
+        """
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            index = len(self.buckets)
+
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def toDict(self):
+        """
+        Describe the histogram.
+
+        Returns
+        -------
+        dict
+            The upper bounds as ``"buckets"`` with the count of each bucket, not
+            cumulative, as ``"counts"``. The last count is for the observations
+            larger than every bound. Also the number of observations as
+            ``"count"``, and their sum as ``"sum"``.
+
+        """
+        return {"buckets": list(self.buckets), "counts": list(self.counts), "count": self.count, "sum": self.sum}
+
+
+def enable():
+    """
+    Start recording. Until this is called every function in this module does
+    nothing, so the instrumentation costs next to nothing when it's off.
+    """
+    global _enabled, _started
+
+    _enabled = True
+    _started = perf_counter()
+
+
+def enabled():
+    """
+    Check whether recording is on.
+
+    Returns
+    -------
+    bool
+        True if ``enable()`` was called.
+
+    """
+    return _enabled
+
+
+def peakRss():
+    """
+    Get the peak resident memory of the process so far.
+
+    Returns
+    -------
+    int
+        The peak resident memory, in bytes.
+
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@contextmanager
+def span(name):
+    """
+    Time a phase of the program. Spans can be nested, and are recorded in the
+    order they finish along with the peak resident memory at that point.
+
+    Parameters
+    ----------
+    name : str
+        Name of the phase.
+
+    """
+    if not _enabled:
+        yield
+        return
+
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        seconds = perf_counter() - start
+        with _lock:
+            _spans.append({"name": name, "start": start - _started, "seconds": seconds, "peakRss": peakRss()})
+
+
+def count(name, value=1):
+    """
+    Add to a counter.
+
+    Parameters
+    ----------
+    name : str
+        Name of the counter.
+    value : int, optional
+        How much to add.
+
+    """
+    if not _enabled:
+        return
+
+    with _lock:
+        _counters[name] += value
+
+
+def observe(name, seconds, label=""):
+    """
+    Add a latency to a histogram.
+
+    Parameters
+    ----------
+    name : str
+        Name of the histogram.
+    seconds : float
+        The latency, in seconds.
+    label : str, optional
+        Keeps separate histograms under the same name, such as one for every
+        host.
+
+    """
+    if not _enabled:
+        return
+
+    with _lock:
+        if (name, label) not in _histograms:
+            _histograms[(name, label)] = Histogram()
+        _histograms[(name, label)].observe(seconds)
+
+
+def report():
+    """
+    Gather everything recorded so far.
+
+    Returns
+    -------
+    dict
+        The spans as ``"spans"``, the counters as ``"counters"``, and the
+        histograms as ``"histograms"``, each one described by
+        ``Histogram.toDict()`` along with its ``"name"`` and ``"label"``. Also
+        the peak resident memory in bytes as ``"peakRss"``, the seconds since
+        ``enable()`` as ``"seconds"``, and the time of the report as
+        ``"time"``.
+
+    """
+    with _lock:
+        return {"time": time(),
+                "seconds": perf_counter() - _started if _started is not None else 0.0,
+                "peakRss": peakRss(),
+                "spans": list(_spans),
+                "counters": dict(_counters),
+                "histograms": [dict(histogram.toDict(), name=name, label=label)
+                               for (name, label), histogram in sorted(_histograms.items())]}
+
+
+def formatSummary(profile):
+    """
+    Format a report as a summary for people to read.
+
+    Parameters
+    ----------
+    profile : dict
+        A report, as returned by ``report()``.
+
+    Returns
+    -------
+    str
+        The summary.
+
+    """
+    lines = ["=> Profile"]
+
+    lines.append("    => Phases:")
+    for span in profile["spans"]:
+        lines.append("        => %-24s %9.3f s  %8.1f MiB peak" % (span["name"], span["seconds"],
+                                                                   span["peakRss"] / 2 ** 20))
+
+    if profile["counters"]:
+        lines.append("    => Counters:")
+        for name in sorted(profile["counters"]):
+            lines.append("        => %-24s %9d" % (name, profile["counters"][name]))
+
+    for histogram in profile["histograms"]:
+        name = histogram["name"]
+        label = histogram["label"]
+        requests = histogram["count"]
+        average = histogram["sum"] / requests * 1000 if requests else 0.0
+        lines.append("    => %(name)s %(label)s: %(requests)s requests, %(average).1f ms average" % locals())
+
+        bounds = ["<= %g s" % bound for bound in histogram["buckets"]] + ["> %g s" % histogram["buckets"][-1]]
+        for bound, bucketCount in zip(bounds, histogram["counts"]):
+            if bucketCount:
+                lines.append("        => %-10s %9d" % (bound, bucketCount))
+
+    seconds = profile["seconds"]
+    peak = profile["peakRss"] / 2 ** 20
+    lines.append("    => Total: %(seconds).3f s, %(peak).1f MiB peak resident memory" % locals())
+
+    return "\n".join(lines) + "\n"
+
+
+def _promLabels(labels):
+    # Format labels the way the Prometheus text format wants them
+    if not labels:
+        return ""
+
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        pairs.append("%(key)s=\"%(value)s\"" % locals())
+    return "{%s}" % ",".join(pairs)
+
+
+def formatPrometheus(profile):
+    """
+    Format a report in the Prometheus text format, to be picked up by
+    node_exporter's textfile collector. Every metric is prefixed with
+    ``augur_``. Spans with the same name, like the ones timed once for every
+    repository, are added up into one series, with how many there were as
+    ``augur_phase_count``.
+
+    Parameters
+    ----------
+    profile : dict
+        A report, as returned by ``report()``.
+
+    Returns
+    -------
+    str
+        The metrics.
+
+    """
+    phases = {}
+    for span in profile["spans"]:
+        seconds, spans = phases.get(span["name"], (0.0, 0))
+        phases[span["name"]] = (seconds + span["seconds"], spans + 1)
+
+    lines = ["# HELP augur_phase_seconds Time spent in every phase of the last run.",
+             "# TYPE augur_phase_seconds gauge"]
+    for phase, (seconds, spans) in phases.items():
+        lines.append("augur_phase_seconds%s %r" % (_promLabels([("phase", phase)]), seconds))
+
+    lines.extend(["# HELP augur_phase_count How many times every phase ran in the last run.",
+                  "# TYPE augur_phase_count gauge"])
+    for phase, (seconds, spans) in phases.items():
+        lines.append("augur_phase_count%s %d" % (_promLabels([("phase", phase)]), spans))
+
+    lines.extend(["# HELP augur_peak_rss_bytes Peak resident memory of the last run.",
+                  "# TYPE augur_peak_rss_bytes gauge",
+                  "augur_peak_rss_bytes %d" % profile["peakRss"],
+                  "# HELP augur_last_run_timestamp_seconds When the last run finished.",
+                  "# TYPE augur_last_run_timestamp_seconds gauge",
+                  "augur_last_run_timestamp_seconds %r" % profile["time"]])
+
+    for name in sorted(profile["counters"]):
+        lines.extend(["# TYPE augur_%(name)s gauge" % locals(),
+                      "augur_%s %d" % (name, profile["counters"][name])])
+
+    typed = set()
+    for histogram in profile["histograms"]:
+        name = "augur_%s" % histogram["name"]
+        if name not in typed:
+            lines.append("# TYPE %(name)s histogram" % locals())
+            typed.add(name)
+
+        labels = [("host", histogram["label"])] if histogram["label"] else []
+        cumulative = 0
+        for bound, bucketCount in zip(histogram["buckets"], histogram["counts"]):
+            cumulative += bucketCount
+            lines.append("%s_bucket%s %d" % (name, _promLabels(labels + [("le", "%g" % bound)]), cumulative))
+        lines.append("%s_bucket%s %d" % (name, _promLabels(labels + [("le", "+Inf")]), histogram["count"]))
+        lines.append("%s_sum%s %r" % (name, _promLabels(labels), histogram["sum"]))
+        lines.append("%s_count%s %d" % (name, _promLabels(labels), histogram["count"]))
+
+    return "\n".join(lines) + "\n"
+
+
+def writeReport(output="summary", profileFile=None):
+    """
+    Write everything recorded as a summary, a JSON trace or a Prometheus
+    textfile. Files are written to a temporary file first and then moved into
+    place, so node_exporter never reads a partial file.
+
+    Parameters
+    ----------
+    output : str, optional
+        Either ``"summary"``, ``"json"`` or ``"prometheus"``.
+    profileFile : str, optional
+        The file to write to, defaults to stderr.
+
+    """
+    profile = report()
+    if output == "json":
+        text = json.dumps(profile, indent=2) + "\n"
+    elif output == "prometheus":
+        text = formatPrometheus(profile)
+    else:
+        text = formatSummary(profile)
+
+    if not profileFile:
+        stderr.write(text)
+        stderr.flush()
+        return
+
+    tmpFile = "%(profileFile)s.tmp" % locals()
+    try:
+        with open(tmpFile, "w") as file:
+            file.write(text)
+        replace(tmpFile, profileFile)
+    except IOError as e:
+        print("=> Error! Could not write the profile to %(profileFile)s." % locals())
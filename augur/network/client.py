@@ -0,0 +1,376 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import gzip
+import zlib
+
+from base64 import b64encode
+from contextlib import contextmanager
+from http import client as httpClient
+from threading import Lock
+from time import perf_counter, sleep
+from urllib.parse import unquote, urljoin, urlsplit
+from urllib.request import getproxies, proxy_bypass_environment
+
+from augur.display import profiler
+
+# Errors that are worth trying the request again for
+_retryErrors = (OSError, httpClient.HTTPException)
+_retryStatuses = (429, 500, 502, 503, 504)
+_redirectStatuses = (301, 302, 303, 307, 308)
+
+
+class HttpError(Exception):
+    """
+    Raised when a request could not be completed, either because the server
+    answered with an error status or because every retry failed.
+    """
+
+
+class Response:
+    """
+    A finished response from ``HttpClient.get()``. The body has already been
+    read in full and decompressed.
+
+    Parameters
+    ----------
+    url : str
+        The URL that was finally fetched, after following any redirects.
+    status : int
+        The HTTP status code of the response.
+    headers : http.client.HTTPMessage
+        The headers of the response.
+    body : bytes
+        The decompressed body of the response.
+
+    """
+
+    def __init__(self, url, status, headers, body):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class HttpClient:
+    """
+    A small HTTP client that keeps a pool of keep-alive connections for every
+    host it talks to, so consecutive requests don't each pay for a new TCP and
+    TLS handshake. Responses are requested gzip or deflate compressed, every
+    request has a timeout, and failed requests are retried with exponential
+    backoff. Connections are handed out one request at a time, so a single
+    client can be shared between threads. The proxies set in the
+    ``http_proxy`` and ``https_proxy`` environment variables are used, except
+    for the hosts in ``no_proxy``. HTTPS is tunneled through the proxy with
+    ``CONNECT``.
+
+    Parameters
+    ----------
+    timeout : float, optional
+        Seconds to wait on the network before a request is considered failed.
+    retries : int, optional
+        How many times a failed request is tried again before giving up.
+    backoff : float, optional
+        Seconds to wait before the first retry. The wait doubles after every
+        retry.
+
+    """
+
+    def __init__(self, timeout=30, retries=3, backoff=1.0):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.idle = {}
+        self.lock = Lock()
+        self.proxies = getproxies()
+
+    def _proxy(self, scheme, host):
+        # Find the proxy to reach the host through, if there is one
+        proxy = self.proxies.get(scheme)
+        if not proxy or proxy_bypass_environment(host, self.proxies):
+            return None
+
+        return urlsplit(proxy if "://" in proxy else "http://%(proxy)s" % locals())
+
+    def _proxyHeaders(self, proxy):
+        # Send the credentials of the proxy along, if it has any
+        if not proxy.username:
+            return {}
+
+        credentials = "%s:%s" % (unquote(proxy.username), unquote(proxy.password or ""))
+        return {"Proxy-Authorization": "Basic %s" % b64encode(credentials.encode("utf-8")).decode("ascii")}
+
+    def _acquire(self, scheme, host):
+        # Reuse an idle connection to the host if there is one
+        with self.lock:
+            if self.idle.get((scheme, host)):
+                return self.idle[(scheme, host)].pop(), True
+
+        proxy = self._proxy(scheme, host)
+        if not proxy:
+            if scheme == "https":
+                return httpClient.HTTPSConnection(host, timeout=self.timeout), False
+            return httpClient.HTTPConnection(host, timeout=self.timeout), False
+
+        if scheme == "https":
+            connection = httpClient.HTTPSConnection(proxy.netloc.rpartition("@")[2], timeout=self.timeout)
+            connection.set_tunnel(host, headers=self._proxyHeaders(proxy))
+            return connection, False
+        return httpClient.HTTPConnection(proxy.netloc.rpartition("@")[2], timeout=self.timeout), False
+
+    def _release(self, url, response, connection):
+        # Hand the connection back to the pool, unless it can't be reused
+        parts = urlsplit(url)
+        if response.isclosed() and not response.will_close:
+            with self.lock:
+                self.idle.setdefault((parts.scheme, parts.netloc), []).append(connection)
+        else:
+            connection.close()
+
+    def _request(self, url, headers):
+        # Send a single request and wait for the response headers
+        parts = urlsplit(url)
+        target = parts.path or "/"
+        if parts.query:
+            target = "%s?%s" % (target, parts.query)
+
+        # Plain HTTP goes to the proxy with the full URL
+        proxy = self._proxy(parts.scheme, parts.netloc)
+        if proxy and parts.scheme == "http":
+            target = url
+            headers = dict(headers, **self._proxyHeaders(proxy))
+
+        connection, reused = self._acquire(parts.scheme, parts.netloc)
+        try:
+            connection.request("GET", target, headers=headers)
+            return connection.getresponse(), connection
+        except _retryErrors:
+            connection.close()
+
+            # The server may have dropped an idle connection, try a fresh one
+            if not reused:
+                raise
+            return self._request(url, headers)
+
+    def _open(self, url, headers, redirects, read):
+        # Send a request, following redirects and retrying on failure
+        attempt = 0
+        while True:
+            connection = None
+            start = perf_counter()
+            try:
+                response, connection = self._request(url, headers)
+                status = response.status
+                redirect = status in _redirectStatuses and redirects > 0 and response.getheader("Location")
+                body = None
+                if read or redirect or status in _retryStatuses:
+                    body = response.read()
+            except _retryErrors as e:
+                if connection:
+                    connection.close()
+                error = "%(url)s: %(e)s" % locals()
+                profiler.count("http_errors")
+            else:
+                # Streamed bodies are timed up to the response headers
+                profiler.observe("http_request_seconds", perf_counter() - start, urlsplit(url).netloc)
+                profiler.count("http_requests")
+                if body is not None:
+                    profiler.count("http_bytes", len(body))
+                if redirect:
+                    self._release(url, response, connection)
+                    url = urljoin(url, response.getheader("Location"))
+                    redirects -= 1
+                    continue
+                if status not in _retryStatuses:
+                    break
+                self._release(url, response, connection)
+                error = "%(url)s: HTTP %(status)s" % locals()
+
+            if attempt >= self.retries:
+                raise HttpError(error)
+            profiler.count("http_retries")
+            sleep(self.backoff * 2 ** attempt)
+            attempt += 1
+
+        if status >= 400:
+            if body is None:
+                connection.close()
+            else:
+                self._release(url, response, connection)
+            raise HttpError("%(url)s: HTTP %(status)s" % locals())
+
+        return url, response, connection, body
+
+    def get(self, url, headers=None, redirects=5):
+        """
+        Fetch a URL, following redirects and retrying on failure. Network
+        errors and the ``429`` and ``5xx`` statuses are retried, any other
+        error status is raised right away.
+
+        Parameters
+        ----------
+        url : str
+            The URL to fetch, with a valid web protocol such as ``http://`` or
+            ``https://``.
+        headers : dict, optional
+            Extra headers to send along with the request.
+        redirects : int, optional
+            The maximum number of redirects that will be followed.
+
+        Returns
+        -------
+        Response
+            The finished response, with the body already decompressed.
+
+        Raises
+        ------
+        HttpError
+            If the server answered with an error status, or the request still
+            failed after every retry.
+
+        """
+        requestHeaders = {
+            "User-Agent": "Augur",
+            "Accept-Encoding": "gzip, deflate"}
+        requestHeaders.update(headers or {})
+
+        url, response, connection, body = self._open(url, requestHeaders, redirects, True)
+        self._release(url, response, connection)
+
+        # Undo any compression the server applied
+        encoding = (response.getheader("Content-Encoding") or "").lower()
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "deflate":
+            try:
+                body = zlib.decompress(body)
+            except zlib.error:
+                body = zlib.decompress(body, -zlib.MAX_WBITS)
+
+        return Response(url, response.status, response.msg, body)
+
+    @contextmanager
+    def stream(self, url, headers=None, redirects=5):
+        """
+        Fetch a URL without reading the body, so it can be consumed while it is
+        still being downloaded. Redirects and retries are handled the same way
+        as ``get()``, but only until the response headers arrive. The body is
+        requested uncompressed, since it's handed over as it comes off the
+        wire. Use it as a context manager, the connection goes back to the pool
+        once the body has been read in full.
+
+        Parameters
+        ----------
+        url : str
+            The URL to fetch, with a valid web protocol such as ``http://`` or
+            ``https://``.
+        headers : dict, optional
+            Extra headers to send along with the request.
+        redirects : int, optional
+            The maximum number of redirects that will be followed.
+
+        Yields
+        ------
+        http.client.HTTPResponse
+            The response, as a file object the body can be read from.
+
+        Raises
+        ------
+        HttpError
+            If the server answered with an error status, or the request still
+            failed after every retry.
+
+        """
+        requestHeaders = {
+            "User-Agent": "Augur",
+            "Accept-Encoding": "identity"}
+        requestHeaders.update(headers or {})
+
+        url, response, connection, body = self._open(url, requestHeaders, redirects, False)
+        try:
+            yield response
+        finally:
+            self._release(url, response, connection)
+
+    def close(self):
+        """
+        Close every idle connection in the pool.
+
+        """
+        with self.lock:
+            for connections in self.idle.values():
+                for connection in connections:
+                    connection.close()
+            self.idle = {}
+
+
+_client = None
+_clientLock = Lock()
+
+
+def configureClient(timeout=30, retries=3, backoff=1.0):
+    """
+    Set up the shared client used by the scraper and the repo downloader. Any
+    connections the previous shared client held are closed.
+
+    Parameters
+    ----------
+    timeout : float, optional
+        Seconds to wait on the network before a request is considered failed.
+    retries : int, optional
+        How many times a failed request is tried again before giving up.
+    backoff : float, optional
+        Seconds to wait before the first retry. The wait doubles after every
+        retry.
+
+    Returns
+    -------
+    HttpClient
+        The newly configured shared client.
+
+    """
+    global _client
+
+    with _clientLock:
+        if _client:
+            _client.close()
+        _client = HttpClient(timeout, retries, backoff)
+
+        return _client
+
+
+def getClient():
+    """
+    Get the shared client, setting one up with the default settings if
+    ``configureClient()`` hasn't been called yet. The client is set up under a
+    lock, so threads asking for it at the same time all get the same one.
+
+    Returns
+    -------
+    HttpClient
+        The shared client.
+
+    """
+    global _client
+
+    with _clientLock:
+        if not _client:
+            _client = HttpClient()
+
+        return _client
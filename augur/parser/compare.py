@@ -17,13 +17,21 @@
 #   You should have received a copy of the GNU General Public License
 #   along with Augur. If not, see <http://www.gnu.org/licenses/>.
 
+import json
 import subprocess
 
+from sys import stdout
+
+from augur.configuration.blacklist import BlacklistMatcher
+from augur.display import profiler
+from augur.parser import version, versionCache
+
 
 def vercmpCompare(winry, aur):
     """
     Compare two versions with ``vercmp`` and return the result. Function does
-    directly call ``vercmp`` with subprocess.
+    directly call ``vercmp`` with subprocess. This is only kept as a fallback,
+    ``version.vercmp()`` gives the same results without forking a process.
 
     Parameters
     ----------
@@ -45,33 +53,223 @@ def vercmpCompare(winry, aur):
         or -1. The meaning of the numbers are as follows:
 
     """
+    profiler.count("vercmp_forks")
     vercmpRaw = subprocess.run(["vercmp", winry, aur], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
 
     return vercmpRaw.stdout.decode("utf-8").strip()
 
 
-def compare(winry, aur, blacklist):
+def vercmpCompareMany(pairs):
+    """
+    Compare a list of version pairs with ``vercmpCompare()``. Has the same
+    interface as ``version.vercmpMany()``, but forks ``vercmp`` for every pair.
+
+    Parameters
+    ----------
+    pairs : iterable
+        Iterable of ``(winry, aur)`` version tuples to be compared.
+
+    Returns
+    -------
+    list
+        List of -1, 0 or 1 results, in the same order as ``pairs``.
+
+    """
+    profiler.count("comparisons_run", len(pairs))
+    return [int(vercmpCompare(winry, aur)) for winry, aur in pairs]
+
+
+def compareVersions(winry, aur, blacklist, external=False, cacheSize=10000, repo=None, cache=None):
     """
-    Compare package versions between winry linux repos and AUR upsteam.
-    First the program will get the intersection of the Winry packages and the
-    AUR packages. This saves time greatly when iterating over them to compare
-    versions. Next the function iterates over the list of shared packages and
-    checks for version changes, of which the program will display to the screen.
-    The algorithm for comparison in this function should ideally be optimized
-    in the future to run faster. As is stands, it uses a brute force algorithm
-    which is substancially slowly than an applied sorting algorithm.
+    Compare package versions between winry linux repos and AUR upsteam, and
+    yield a record for every version change.
+    First the packages are grouped by their pkgbase, so the packages split out
+    of a single PKGBUILD are only looked up and compared once. Next the
+    program will get the intersection of the Winry pkgbases and the AUR
+    packages, by looking up the packages of each pkgbase in the AUR packages
+    until one is found, so a memory mapped cache only has those entries read.
+    This saves time greatly when iterating over them to compare versions. Next
+    the function compares the versions of every shared pkgbase that isn't
+    blacklisted with
+    ``version.vercmpMany()``, all of them in a single batch. The ``vercmp`` binary is only used if it's
+    explicitly asked for with ``external``, as forking it for every package is
+    substancially slower. Results of previous comparisons are read from the
+    version cache first, so only new version pairs are compared. Unless the
+    cache is handed in with ``cache``, it's read here and written once the
+    generator is exhausted or closed, if anything new was compared.
 
     Parameters
     ----------
     winry : dict
         All the winry packages as loaded by ``parseRepo.parsePackages()``. All
         the keys should be the names of the packages, and equal to a str version.
-    aur : dict
+        The packages are grouped with ``PackageIndex.groups()`` if it's a
+        ``parseRepo.PackageIndex``, otherwise every package is its own pkgbase.
+    aur : Mapping
         Dictionary of all the AUR packages from the Cache loaded by
         ``load.loadAurCache()``.
     blacklist : dict
         Dictionary of user defined packages to not be included in this search.
-        Loaded from ``blacklist.readBlacklist()``
+        Loaded from ``blacklist.readBlacklist()``, its compiled ``"matcher"`` is
+        used if there is one. A pkgbase is skipped if it or any of its packages
+        is blacklisted.
+    external : bool, optional
+        True to compare with pacman's ``vercmp`` binary through
+        ``vercmpCompare()`` instead of the in process comparison.
+    cacheSize : int, optional
+        The maximum number of comparisons kept in the version cache. Setting it
+        to 0 disables the cache entirely.
+    repo : str, optional
+        Name of the repository the Winry packages are from, added to every
+        record.
+    cache : OrderedDict, optional
+        A version cache read by ``versionCache.readVersionCache()``, to be
+        shared between several calls. The caller is left to write it.
+
+    Yields
+    ------
+    dict
+        A record of a version change, in the order of the pkgbases. The keys
+        are ``"repo"``, ``"name"`` for the pkgbase, ``"packages"`` for the
+        packages built from it, ``"winry"`` and ``"aur"`` for the versions, and
+        ``"direction"`` which is either ``"upgrade"`` or ``"downgrade"``.
+
+    """
+    # Group split packages by their pkgbase, so each pkgbase is looked up once
+    if hasattr(winry, "groups"):
+        groups = winry.groups()
+    else:
+        groups = {pack: [pack] for pack in winry}
+
+    # Grab the shared pkgbases, only looking up the Winry packages in the AUR
+    matcher = blacklist.get("matcher") or BlacklistMatcher(blacklist["blacklist"])
+    checkedPacks = []
+    for base in sorted(groups):
+        members = groups[base]
+        for pack in members:
+            aurVersion = aur.get(pack)
+            if aurVersion is not None:
+                break
+        else:
+            continue
+
+        # Blacklisting the pkgbase or any of its packages skips all of them
+        if matcher.matches(base, aurVersion) or any(matcher.matches(member, aurVersion) for member in members):
+            continue
+        checkedPacks.append((base, members, winry[pack], aurVersion))
+
+    profiler.count("packages_compared", len(checkedPacks))
+
+    vercmpMany = vercmpCompareMany if external else version.vercmpMany
+    ownCache = cache is None and cacheSize
+    if ownCache:
+        cache = readCache()
+    cachedSize = len(cache) if cache is not None else 0
+
+    try:
+        # Compare every pair in one batch, so repeated pairs are only compared
+        # once and the vercmp binary gets them all at once
+        pairs = [(winryVersion, aurVersion) for base, members, winryVersion, aurVersion in checkedPacks]
+        if cache is not None:
+            vercmpCodes = versionCache.cachedVercmp(cache, pairs, vercmpMany)
+        else:
+            vercmpCodes = vercmpMany(pairs)
+
+        for (base, members, winryVersion, aurVersion), vercmpCode in zip(checkedPacks, vercmpCodes):
+            if vercmpCode == -1:
+                yield {"repo": repo, "name": base, "packages": members, "winry": winryVersion, "aur": aurVersion,
+                       "direction": "upgrade"}
+            elif vercmpCode == 1:
+                yield {"repo": repo, "name": base, "packages": members, "winry": winryVersion, "aur": aurVersion,
+                       "direction": "downgrade"}
+    finally:
+        if ownCache:
+            writeCache(cache, cachedSize, cacheSize)
+
+
+def readCache():
+    """
+    Read the version cache, timing it with the profiler.
+
+    Returns
+    -------
+    OrderedDict
+        The version cache, see ``versionCache.readVersionCache()``.
+
+    """
+    with profiler.span("readVersionCache"):
+        return versionCache.readVersionCache()
+
+
+def writeCache(cache, cachedSize, cacheSize):
+    """
+    Write the version cache back, but only if new comparisons were added to it
+    since it was read, as reordering the entries isn't worth a write.
+
+    Parameters
+    ----------
+    cache : OrderedDict
+        The version cache.
+    cachedSize : int
+        The number of entries in the cache when it was read.
+    cacheSize : int
+        The maximum number of comparisons kept in the version cache.
+
+    """
+    if len(cache) > cachedSize:
+        with profiler.span("writeVersionCache"):
+            versionCache.writeVersionCache(cache, cacheSize)
+
+
+def packageLabel(record):
+    """
+    Name a version change for display, listing the packages of a pkgbase when
+    they aren't just the pkgbase itself.
+
+    Parameters
+    ----------
+    record : dict
+        A record of a version change, as yielded by ``compareVersions()``.
+
+    Returns
+    -------
+    str
+        The pkgbase, followed by its packages if there are any others.
+
+    """
+    pack = record["name"]
+    packages = record.get("packages") or [pack]
+    if packages == [pack]:
+        return pack
+
+    return "%s (%s)" % (pack, ", ".join(packages))
+
+
+def compare(winry, aur, blacklist, external=False, cacheSize=10000, cache=None):
+    """
+    Compare package versions between winry linux repos and AUR upsteam, and
+    display any version changes to the screen as they are found by
+    ``compareVersions()``.
+
+    Parameters
+    ----------
+    winry : dict
+        All the winry packages as loaded by ``parseRepo.parsePackages()``.
+    aur : Mapping
+        Dictionary of all the AUR packages from the Cache loaded by
+        ``load.loadAurCache()``.
+    blacklist : dict
+        Dictionary of user defined packages to not be included in this search.
+        Loaded from ``blacklist.readBlacklist()``.
+    external : bool, optional
+        True to compare with pacman's ``vercmp`` binary, see
+        ``compareVersions()``.
+    cacheSize : int, optional
+        The maximum number of comparisons kept in the version cache, see
+        ``compareVersions()``.
+    cache : OrderedDict, optional
+        A version cache shared between several calls, see
+        ``compareVersions()``.
 
     Returns
     -------
@@ -83,30 +281,142 @@ def compare(winry, aur, blacklist):
     """
     print("=> Parsing packages to compare")
 
-    # Grab list of shared packs
-    aurPacks = list(aur.keys())
-    winryPacks = list(winry.keys())
-
-    sharedPacks = set(aurPacks).intersection(winryPacks)
-
-    # Begin comparing
+    # Display the results
     results = False
-    for pack in sharedPacks:
-        if pack not in blacklist["blacklist"]:
-            vercmpCode = vercmpCompare(winry[pack], aur[pack])
-
-            if vercmpCode == "-1":
-                print("    => Upgrade: %(pack)s" % locals())
-                print("".join(["        => winry: ", winry[pack]]))
-                print("".join(["        => AUR:   ", aur[pack]]))
-                results = True
-            elif vercmpCode == "1":
-                print("    => Downgrade: %(pack)s" % locals())
-                print("".join(["        => winry: ", winry[pack]]))
-                print("".join(["        => AUR:   ", aur[pack]]))
-                results = True
+    for record in compareVersions(winry, aur, blacklist, external, cacheSize, cache=cache):
+        pack = packageLabel(record)
+        direction = record["direction"].capitalize()
+        print("    => %(direction)s: %(pack)s" % locals())
+        print("".join(["        => winry: ", record["winry"]]))
+        print("".join(["        => AUR:   ", record["aur"]]))
+        results = True
 
     if not results:
         print("=> There are no updates or downgrades available.")
 
     return results
+
+
+def compareRepos(repos, aur, blacklist, external=False, cacheSize=10000, output="text", file=None, cache=None):
+    """
+    Compare the packages of several repositories against the AUR, and display
+    the results grouped by repository. Each repository is compared on its own,
+    against the same AUR packages and blacklist. The version cache is only
+    read once for all of them, and written once at the end if anything new was
+    compared. With the ``"text"`` output the
+    results are displayed by ``compare()``. With the ``"ndjson"`` output every
+    record from ``compareVersions()`` is written as a line of JSON as soon as
+    it's found, and with the ``"json"`` output the records are written as a JSON
+    array, one element at a time.
+
+    Parameters
+    ----------
+    repos : dict
+        Dictionary of repositories as loaded by ``parseRepo.parseRepos()``. The
+        keys are the names of the repositories, and the values are dictionaries
+        of their packages and versions.
+    aur : dict
+        Dictionary of all the AUR packages from the Cache loaded by
+        ``load.loadAurCache()``.
+    blacklist : dict
+        Dictionary of user defined packages to not be included in this search.
+        Loaded from ``blacklist.readBlacklist()``
+    external : bool, optional
+        True to compare with pacman's ``vercmp`` binary, see ``compare()``.
+    cacheSize : int, optional
+        The maximum number of comparisons kept in the version cache, see
+        ``compare()``.
+    output : str, optional
+        Either ``"text"``, ``"ndjson"`` or ``"json"``.
+    file : file, optional
+        The file the records are written to, defaults to stdout. Only used with
+        the ``"ndjson"`` and ``"json"`` outputs.
+    cache : OrderedDict, optional
+        The version cache, if it was already read with ``readCache()``. It's
+        still written back here.
+
+    Returns
+    -------
+    bool
+        True if there were any upgrades or downgrades in any of the
+        repositories. False if there were not any.
+
+    """
+    if cache is None and cacheSize:
+        cache = readCache()
+    cachedSize = len(cache) if cache is not None else 0
+
+    try:
+        if output == "text":
+            results = False
+            for repo in sorted(repos):
+                print("=> Repository: %(repo)s" % locals())
+                if compare(repos[repo], aur, blacklist, external, 0, cache):
+                    results = True
+
+            return results
+
+        records = (record for repo in sorted(repos)
+                   for record in compareVersions(repos[repo], aur, blacklist, external, 0, repo, cache))
+        return writeRecords(records, output, file)
+    finally:
+        if cache is not None:
+            writeCache(cache, cachedSize, cacheSize)
+
+
+def writeRecords(records, output="text", file=None):
+    """
+    Write version change records as they come in. With the ``"ndjson"`` output
+    every record is written as a line of JSON, and with the ``"json"`` output
+    the records are written as a JSON array once they have all been read, so
+    a comparison that fails part way never leaves half an array behind. The
+    ``"text"`` output displays them the same way as ``compare()``, grouped by
+    repository.
+
+    Parameters
+    ----------
+    records : iterable
+        Records of version changes, as yielded by ``compareVersions()``.
+    output : str, optional
+        Either ``"text"``, ``"ndjson"`` or ``"json"``.
+    file : file, optional
+        The file the records are written to, defaults to stdout.
+
+    Returns
+    -------
+    bool
+        True if there were any records, otherwise False.
+
+    """
+    file = file or stdout
+    if output == "json":
+        records = list(records)
+        file.write("[")
+
+    results = False
+    repo = None
+    for record in records:
+        if output == "json":
+            file.write(",\n" if results else "\n")
+            file.write(json.dumps(record))
+        elif output == "ndjson":
+            file.write(json.dumps(record) + "\n")
+        else:
+            if record["repo"] != repo:
+                repo = record["repo"]
+                file.write("=> Repository: %(repo)s\n" % locals())
+            pack = packageLabel(record)
+            direction = record["direction"].capitalize()
+            file.write("    => %(direction)s: %(pack)s\n" % locals())
+            file.write("".join(["        => winry: ", record["winry"], "\n"]))
+            file.write("".join(["        => AUR:   ", record["aur"], "\n"]))
+        file.flush()
+        results = True
+
+    if output == "json":
+        file.write("\n]\n" if results else "]\n")
+    elif output == "text" and not results:
+        file.write("=> There are no updates or downgrades available.\n")
+    file.flush()
+
+    return results
@@ -17,59 +17,806 @@
 #   You should have received a copy of the GNU General Public License
 #   along with Augur. If not, see <http://www.gnu.org/licenses/>.
 
-from urllib import request
-from tarfile import open as tarOpen
+import bz2
+import lzma
+import re
+import zlib
 
+from concurrent.futures import ThreadPoolExecutor
+from os import makedirs, path, replace, stat
+from threading import local
+from pickle import load as pickleLoad, dump as pickleDump, HIGHEST_PROTOCOL
+from yaml import load, dump, CDumper as Dumper, CLoader as Loader
 
-def downloadDatabase(mirror):
+from augur.configuration import configure
+from augur.display import profiler
+from augur.network import client
+
+# Where a database lives on the mirror, %(arch)s can also be used
+defaultRepoPath = "%(repo)s/%(repo)s.db"
+
+# Bumped whenever the layout of the index changes, older indexes are rebuilt
+indexFormat = 3
+
+# The fields of the desc files that are kept
+_descFields = ("%NAME%", "%VERSION%", "%BASE%")
+
+# Long paths are stored in a pax header ahead of the member
+_paxPath = re.compile(rb"\d+ path=([^\n]*)\n")
+
+# Messages held back while a database is parsed on another thread
+_held = local()
+
+
+def _print(message):
+    # Print a message, or hold it back for parseRepos() to print in order
+    messages = getattr(_held, "messages", None)
+    if messages is None:
+        print(message)
+    else:
+        messages.append(message)
+
+
+class PackageIndex(dict):
     """
-    Download the database of packages and versions from the specified mirror.
-    Performs no parsing, just downloads it to ``/tmp/winry-testing.db``. In the
-    future this should be expanded to perform more error handling on the Downloading
-    of the database.
+    Dictionary of the packages in a database, with the names of the packages as
+    keys and their versions as values, that also knows the pkgbase of every
+    package. Only the packages with a pkgbase different from their name are
+    kept in ``bases``, which for most databases is just the split packages.
+
+    Parameters
+    ----------
+    packages : dict, optional
+        The names and versions of the packages.
+    bases : dict, optional
+        The pkgbase of the packages that don't share their name with it.
+
+    """
+
+    def __init__(self, packages=(), bases=None):
+        dict.__init__(self, packages)
+        self.bases = bases or {}
+
+    def base(self, name):
+        """
+        Get the pkgbase of a package.
+
+        Parameters
+        ----------
+        name : str
+            Name of the package.
+
+        Returns
+        -------
+        str
+            The pkgbase of the package.
+
+        """
+        return self.bases.get(name, name)
+
+    def groups(self):
+        """
+        Group the packages by their pkgbase, so every pkgbase only has to be
+        looked up and compared once.
+
+        Returns
+        -------
+        dict
+            Dictionary with the pkgbases as keys, and sorted lists of their
+            packages as values. A package named after the pkgbase is always
+            first, as that's the one to look up in the AUR.
+
+        """
+        groups = {}
+        for name in self:
+            groups.setdefault(self.bases.get(name, name), []).append(name)
+
+        for base, members in groups.items():
+            members.sort(key=lambda member: (member != base, member))
+
+        return groups
+
+
+def repoLabel(repo, arch=None):
+    """
+    Name a repository for display and for its files in the cache. Includes the
+    architecture, if one is given.
+
+    Parameters
+    ----------
+    repo : str
+        Name of the repository, such as ``winry-testing``.
+    arch : str, optional
+        Architecture of the repository, such as ``x86_64``.
+
+    Returns
+    -------
+    str
+        The repository name, followed by the architecture if there is one.
+
+    """
+    if arch:
+        return "%(repo)s-%(arch)s" % locals()
+
+    return repo
+
+
+def databaseUrl(mirror, repo="winry-testing", arch=None, repoPath=defaultRepoPath):
+    """
+    Build the URL of a repository database on the mirror.
 
     Parameters
     ----------
     mirror : str
         URL of the mirror to download the database from. URL most contain a valid
         web protocol such as ``http://`` or ``https://``
+    repo : str, optional
+        Name of the repository.
+    arch : str, optional
+        Architecture of the repository.
+    repoPath : str, optional
+        Path of the database on the mirror, with ``%(repo)s`` and ``%(arch)s``
+        filled in with the repository name and architecture. It has to contain
+        ``%(arch)s`` if an architecture is given, otherwise every architecture
+        would share the same database.
+
+    Returns
+    -------
+    str
+        The full URL of the database.
+
+    Raises
+    ------
+    ValueError
+        If an architecture is given, but ``repoPath`` doesn't contain
+        ``%(arch)s``.
+
+    """
+    if arch and "%(arch)s" not in repoPath:
+        raise ValueError("RepoPath has to contain %%(arch)s when Arches are set, not %(repoPath)s" % locals())
+
+    databasePath = repoPath % {"repo": repo, "arch": arch}
+
+    return "%(mirror)s/%(databasePath)s" % locals()
+
 
+def readValidators(validatorFile):
     """
-    print("=> Downloading database from mirror")
+    Read the validators saved from the last download of the database. Uses
+    CLoader as opposed to PyYAML's default Loader. A missing or unreadable file
+    just means there are no validators to send.
 
-    request.urlretrieve("%(mirror)s/winry-testing/winry-testing.db" % locals(), "/tmp/winry-testing.db")
+    Parameters
+    ----------
+    validatorFile : str
+        Full path to the file the validators are stored in.
 
+    Returns
+    -------
+    dict
+        Dictionary that may contain the ``"ETag"`` and ``"Last-Modified"``
+        headers of the last download.
 
-def parsePackages(mirror):
     """
-    Parse a tarred pacman database and find the packages and versions. Opens the
-    database and then parses all of the top level directory names to generate
-    a dictionary of all the packages and versions. This is essentially a more
-    advanced wrapper of ``downloadDatabases()``
+    validators = {}
+    if path.isfile(validatorFile):
+        try:
+            with open(validatorFile, "r") as file:
+                validators = load(file, Loader=Loader) or {}
+        except IOError as e:
+            _print("=> Error! Database validators not readable, downloading in full.")
+
+    return validators
+
+
+def downloadDatabase(mirror, repo="winry-testing", arch=None, repoPath=defaultRepoPath):
+    """
+    Download the database of packages and versions from the specified mirror.
+    Performs no parsing, just keeps a copy of it at
+    ``$XDG_CACHE_HOME/augur/<repo>.db``, or ``<repo>-<arch>.db`` if an
+    architecture is given. The ``ETag`` and
+    ``Last-Modified`` headers of the download are stored next to it, and sent
+    back with the next request so the mirror can answer with
+    ``304 Not Modified`` when the database hasn't changed. In that case the
+    local copy is used as it is. The download is written to a temporary file
+    first, so an interrupted download never replaces a good copy. Uses the
+    shared ``client.HttpClient``, which takes care of timeouts and retries.
 
     Parameters
     ----------
     mirror : str
         URL of the mirror to download the database from. URL most contain a valid
         web protocol such as ``http://`` or ``https://``
+    repo : str, optional
+        Name of the repository to download the database of.
+    arch : str, optional
+        Architecture of the repository.
+    repoPath : str, optional
+        Path of the database on the mirror, see ``databaseUrl()``.
+
+    Returns
+    -------
+    str
+        The full path to the local copy of the database.
+
+    """
+    label = repoLabel(repo, arch)
+    _print("=> Downloading %(label)s database from mirror" % locals())
+
+    # Find the local copy of the database
+    xdgCache = configure.loadXDGVars()["xdgCache"]
+    makedirs("%(xdgCache)s/augur" % locals(), exist_ok=True)
+    databaseFile = "%(xdgCache)s/augur/%(label)s.db" % locals()
+    validatorFile = "%(databaseFile)s.yaml" % locals()
+
+    # Ask the mirror to only send the database if it changed
+    headers = {}
+    if path.isfile(databaseFile):
+        validators = readValidators(validatorFile)
+        if validators.get("ETag"):
+            headers["If-None-Match"] = validators["ETag"]
+        if validators.get("Last-Modified"):
+            headers["If-Modified-Since"] = validators["Last-Modified"]
+
+    response = client.getClient().get(databaseUrl(mirror, repo, arch, repoPath), headers)
+    if response.status == 304:
+        _print("=> %(label)s database not modified, using local copy" % locals())
+        profiler.count("databases_not_modified")
+        return databaseFile
+    profiler.count("databases_downloaded")
+
+    # Save the new database and its validators
+    with open("%(databaseFile)s.tmp" % locals(), "wb") as database:
+        database.write(response.body)
+    replace("%(databaseFile)s.tmp" % locals(), databaseFile)
+
+    validators = {}
+    for header in ["ETag", "Last-Modified"]:
+        if response.headers.get(header):
+            validators[header] = response.headers.get(header)
+    try:
+        with open(validatorFile, "w") as file:
+            dump(validators, file, encoding="utf-8", Dumper=Dumper)
+    except IOError as e:
+        _print("=> Error! Could not write database validators.")
+
+    return databaseFile
+
+
+def databaseKey(databaseFile):
+    """
+    Build the key that identifies one version of the local database. The key is
+    made up of the size and modification time of the file, which only change
+    when a new database is downloaded.
+
+    Parameters
+    ----------
+    databaseFile : str
+        Full path to the local copy of the database.
+
+    Returns
+    -------
+    tuple
+        The size and the modification time in nanoseconds of the database.
+
+    """
+    databaseStat = stat(databaseFile)
+
+    return databaseStat.st_size, databaseStat.st_mtime_ns
+
+
+def readIndex(databaseFile):
+    """
+    Read the parsed index of the database, if it was built from the database as
+    it is right now. The index is stored next to the database as a pickle, and
+    is ignored when its key doesn't match ``databaseKey()``, or it can't be
+    read.
+
+    Parameters
+    ----------
+    databaseFile : str
+        Full path to the local copy of the database.
+
+    Returns
+    -------
+    PackageIndex
+        All the packages and versions in the database, or None if there is no
+        usable index.
+
+    """
+    indexFile = "%(databaseFile)s.index" % locals()
+    if not path.isfile(indexFile):
+        return None
+
+    try:
+        with open(indexFile, "rb") as file:
+            index = pickleLoad(file)
+    except Exception as e:
+        _print("=> Error! Database index not readable, rebuilding it.")
+        return None
+
+    if not isinstance(index, dict) or index.get("format") != indexFormat:
+        return None
+    if index.get("key") != databaseKey(databaseFile):
+        return None
+
+    return PackageIndex(index["packages"], index["bases"])
+
+
+def writeIndex(databaseFile, packages):
+    """
+    Store the parsed index of the database next to it, keyed with
+    ``databaseKey()`` so it can be used until the next download. The index is
+    written to a temporary file first, and then moved into place.
+
+    Parameters
+    ----------
+    databaseFile : str
+        Full path to the local copy of the database.
+    packages : PackageIndex
+        All the packages and versions in the database.
+
+    Returns
+    -------
+    bool
+        True if the index was written, otherwise False.
+
+    """
+    indexFile = "%(databaseFile)s.index" % locals()
+
+    # Plain containers only, so the index doesn't depend on this module
+    index = {"format": indexFormat, "key": databaseKey(databaseFile), "packages": dict(packages),
+             "bases": getattr(packages, "bases", {})}
+    try:
+        with open("%(indexFile)s.tmp" % locals(), "wb") as file:
+            pickleDump(index, file, protocol=HIGHEST_PROTOCOL)
+        replace("%(indexFile)s.tmp" % locals(), indexFile)
+    except (IOError, OSError) as e:
+        _print("=> Error! Could not write database index.")
+        return False
+
+    return True
+
+
+def splitPackage(entry):
+    """
+    Split a top level directory name from the database into the package name
+    and version. The version is made up of the last two dash separated parts of
+    the name, the pkgver and the pkgrel.
+
+    Parameters
+    ----------
+    entry : str
+        Name of the directory in the database, such as ``augur-0.1.2-1``.
+
+    Returns
+    -------
+    tuple
+        The package name and the package version, in that order.
+
+    """
+    parts = entry.rsplit("-", 2)
+
+    return parts[0], "-".join(parts[1:])
+
+
+def parseDesc(desc):
+    """
+    Parse the fields augur needs out of the ``desc`` file of a package in the
+    database. Every field is a line with its name between percent signs, such
+    as ``%NAME%``, followed by its values one per line, and an empty line.
+
+    Parameters
+    ----------
+    desc : bytes
+        The contents of the ``desc`` file.
 
     Returns
     -------
     dict
-        Dictionary of all the packages and versions from the mirrors database.
-        All the package names will be keys, with their versions as values.
+        Dictionary with ``"%NAME%"``, ``"%VERSION%"`` and ``"%BASE%"`` as keys,
+        if they are in the file, and their first values as values.
+
+    """
+    fields = {}
+    lines = desc.decode("utf-8", "replace").split("\n")
+    for index, line in enumerate(lines[:-1]):
+        if line in _descFields:
+            fields[line] = lines[index + 1].strip()
+
+    return fields
+
+
+def _decompress(file, chunkSize=65536):
+    # Decompress the database as it's read, by looking at its magic number
+    data = file.read(chunkSize)
+    if data[:2] == b"\x1f\x8b":
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif data[:6] == b"\xfd7zXZ\x00":
+        decompressor = lzma.LZMADecompressor()
+    elif data[:3] == b"BZh":
+        decompressor = bz2.BZ2Decompressor()
+    elif data[:4] == b"\x28\xb5\x2f\xfd":
+        raise ValueError("zstd compressed databases are not supported")
+    else:
+        decompressor = None
+
+    while data:
+        yield decompressor.decompress(data) if decompressor else data
+        data = file.read(chunkSize)
+
+    # Running out of input before the end of the stream means it was cut off
+    if decompressor and not decompressor.eof:
+        raise ValueError("Database is truncated")
+
+
+def _tarMembers(chunks):
+    # Split a tar archive into its members as the chunks come in. Only what
+    # pacman databases use is handled: ustar, pax and GNU long names. The
+    # archive has to end with empty blocks, anything else means it was cut off.
+    buffer = bytearray()
+    longName = None
+    ended = False
+    for chunk in chunks:
+        buffer += chunk
+        position = 0
+        while len(buffer) - position >= 512:
+            header = bytes(buffer[position:position + 512])
+
+            # Empty blocks mark the end of the archive
+            if not header.strip(b"\0"):
+                ended = True
+                position += 512
+                continue
+            ended = False
+
+            try:
+                checksum = int(header[148:156].strip(b"\0 ") or b"0", 8)
+                size = int(header[124:136].strip(b"\0 ") or b"0", 8)
+            except ValueError:
+                raise ValueError("Database is not a valid archive")
+            if checksum != sum(header[:148]) + 256 + sum(header[156:]):
+                raise ValueError("Database is not a valid archive")
+
+            end = position + 512 + (size + 511) // 512 * 512
+            if len(buffer) < end:
+                break
+            data = bytes(buffer[position + 512:position + 512 + size])
+            position = end
+
+            typeFlag = header[156:157]
+            if typeFlag == b"L":
+                longName = data.split(b"\0", 1)[0]
+                continue
+            elif typeFlag == b"x":
+                paxPath = _paxPath.search(data)
+                if paxPath:
+                    longName = paxPath.group(1)
+                continue
+            elif typeFlag == b"g":
+                continue
+
+            name = header[:100].split(b"\0", 1)[0]
+            if header[257:262] == b"ustar" and header[345:346] != b"\0":
+                name = header[345:500].split(b"\0", 1)[0] + b"/" + name
+            if longName is not None:
+                name = longName
+                longName = None
+
+            yield name.decode("utf-8", "replace"), typeFlag == b"5" or name.endswith(b"/"), data
+
+        del buffer[:position]
+
+    if buffer.strip(b"\0") or not ended:
+        raise ValueError("Database is truncated")
+
+
+def readDatabase(file):
+    """
+    Read the packages out of a pacman database in a single pass. The archive is
+    decompressed and split into its members as it's read, so it can come
+    straight off the network, and only the ``desc`` files are parsed. Gzip, xz
+    and bzip2 compressed databases are supported. A package without a ``desc``
+    file falls back to the name of its directory, split with
+    ``splitPackage()``.
+
+    Parameters
+    ----------
+    file : file
+        The database, compressed or not, opened in binary mode.
+
+    Yields
+    ------
+    tuple
+        The name, version and pkgbase of each package in the database.
+
+    Raises
+    ------
+    ValueError
+        If the database isn't a valid archive, it's truncated, or its
+        compression isn't supported.
+
+    """
+    directories = []
+    described = set()
+    for name, isDirectory, data in _tarMembers(_decompress(file)):
+        if isDirectory or "/" not in name:
+            directories.append(name.rstrip("/"))
+        elif name.endswith("/desc"):
+            fields = parseDesc(data)
+            if "%NAME%" in fields and "%VERSION%" in fields:
+                described.add(name[:-5])
+                yield fields["%NAME%"], fields["%VERSION%"], fields.get("%BASE%") or fields["%NAME%"]
+
+    for directory in directories:
+        if directory not in described:
+            name, version = splitPackage(directory)
+            yield name, version, name
+
+
+def buildIndex(entries):
+    """
+    Build a ``PackageIndex`` out of the packages read by ``readDatabase()``.
+
+    Parameters
+    ----------
+    entries : iterable
+        The name, version and pkgbase of every package.
+
+    Returns
+    -------
+    PackageIndex
+        All the packages and versions, along with their pkgbases.
+
+    """
+    packages = PackageIndex()
+    for name, version, base in entries:
+        packages[name] = version
+        if base != name:
+            packages.bases[name] = base
+
+    return packages
+
+
+def streamPackages(mirror, repo="winry-testing", arch=None, repoPath=defaultRepoPath):
+    """
+    Parse the database straight from the mirror while it's still downloading.
+    The compressed archive is read from the response by ``readDatabase()``,
+    and every package is handed out as soon as its entry arrives, so nothing is
+    written to disk and only a single archive member is held in memory at a
+    time.
+
+    Parameters
+    ----------
+    mirror : str
+        URL of the mirror to download the database from. URL most contain a valid
+        web protocol such as ``http://`` or ``https://``
+    repo : str, optional
+        Name of the repository to parse the database of.
+    arch : str, optional
+        Architecture of the repository.
+    repoPath : str, optional
+        Path of the database on the mirror, see ``databaseUrl()``.
+
+    Yields
+    ------
+    tuple
+        The name, version and pkgbase of each package in the database.
+
+    """
+    label = repoLabel(repo, arch)
+    _print("=> Streaming %(label)s database from mirror" % locals())
 
+    with client.getClient().stream(databaseUrl(mirror, repo, arch, repoPath)) as response:
+        yield from readDatabase(response)
+
+        # Read off any padding so the connection can be reused
+        response.read()
+
+
+def parsePackages(mirror, stream=False, repo="winry-testing", arch=None, repoPath=defaultRepoPath):
     """
-    # Download an updated database into the /tmp directory
-    downloadDatabase(mirror)
+    Parse a tarred pacman database and find the packages, their versions and
+    their pkgbases. The database is read in a single pass by
+    ``readDatabase()``, which parses the ``desc`` file of every package. This
+    is essentially a more advanced wrapper of ``downloadDatabases()``, or of
+    ``streamPackages()`` when streaming. The index is saved with
+    ``writeIndex()``, and read straight back as long as the database doesn't
+    change, skipping the archive entirely.
+
+    Parameters
+    ----------
+    mirror : str
+        URL of the mirror to download the database from. URL most contain a valid
+        web protocol such as ``http://`` or ``https://``
+    stream : bool, optional
+        True to parse the database while it downloads with ``streamPackages()``,
+        rather than keeping a local copy of it. This skips the conditional
+        download, so the whole database is fetched every time.
+    repo : str, optional
+        Name of the repository to parse the database of.
+    arch : str, optional
+        Architecture of the repository.
+    repoPath : str, optional
+        Path of the database on the mirror, see ``databaseUrl()``.
+
+    Returns
+    -------
+    PackageIndex
+        All the packages and versions from the mirrors database. All the
+        package names will be keys, with their versions as values, and the
+        pkgbases are kept along with them. The program exits if the database
+        can't be read.
+
+    """
+    label = repoLabel(repo, arch)
+    try:
+        if stream:
+            return buildIndex(streamPackages(mirror, repo, arch, repoPath))
+
+        # Download an updated database into the cache
+        databaseFile = downloadDatabase(mirror, repo, arch, repoPath)
 
-    # Open the database as an archive
-    archive = tarOpen("/tmp/winry-testing.db")
-    packagesRaw = [package for package in archive.getnames() if "/" not in package]
+        # Use the index of the database if it's already been parsed
+        packages = readIndex(databaseFile)
+        if packages is not None:
+            profiler.count("database_index_hits")
+            return packages
 
-    # Parse database into dictionary
-    packages = {}
-    for package in packagesRaw:
-        packages[package.rsplit("-", 2)[0]] = "-".join(package.rsplit("-", 2)[1:])
+        # Parse the database in one pass
+        with open(databaseFile, "rb") as file:
+            packages = buildIndex(readDatabase(file))
+    except (ValueError, EOFError, OSError, zlib.error, lzma.LZMAError) as e:
+        _print("=> Error! Could not read the %(label)s database: %(e)s" % locals())
+        exit(1)
+
+    writeIndex(databaseFile, packages)
 
     return packages
+
+
+def _parseHeld(messages, *args):
+    # Run parsePackages() on a worker thread, holding back its messages
+    _held.messages = messages
+    try:
+        return parsePackages(*args)
+    finally:
+        _held.messages = None
+
+
+class RepoJobs:
+    """
+    The databases of several repositories being parsed in the background, as
+    started by ``startRepos()``.
+
+    Parameters
+    ----------
+    executor : ThreadPoolExecutor
+        The executor the databases are parsed on.
+    futures : list
+        List of ``(label, messages, future)`` tuples for every repository and
+        architecture pair, in the order they were configured.
+
+    """
+
+    def __init__(self, executor, futures):
+        self.executor = executor
+        self.futures = futures
+
+    def result(self):
+        """
+        Wait for every database to be parsed. The messages of every repository
+        are held back and printed once it's done, in the order of the
+        repositories, so they never mix with each other or with whatever is
+        printed in the meantime.
+
+        Returns
+        -------
+        dict
+            Dictionary with the label of every repository, as built by
+            ``repoLabel()``, as keys. The values are the ``PackageIndex`` of
+            packages and versions returned by ``parsePackages()``.
+
+        """
+        try:
+            packages = {}
+            for label, messages, future in self.futures:
+                try:
+                    packages[label] = future.result()
+                finally:
+                    for message in messages:
+                        print(message)
+
+            return packages
+        finally:
+            self.executor.shutdown()
+
+
+def startRepos(mirror, repos, stream=False, repoPath=defaultRepoPath, threads=4):
+    """
+    Start parsing the databases of several repositories in the background.
+    Every repository and architecture pair is handed to ``parsePackages()`` on
+    its own thread, so the downloads run side by side, and the caller can go
+    on with something else until it needs the packages.
+
+    Parameters
+    ----------
+    mirror : str
+        URL of the mirror to download the databases from. URL most contain a
+        valid web protocol such as ``http://`` or ``https://``
+    repos : list
+        List of repositories as set in the ``Repos`` configuration. Every entry
+        is a dictionary with the repository's ``"Name"``, and optionally a list
+        of ``"Arches"``.
+    stream : bool, optional
+        True to parse the databases while they download, see
+        ``parsePackages()``.
+    repoPath : str, optional
+        Path of the databases on the mirror, see ``databaseUrl()``. Has to
+        contain ``%(arch)s`` if any repository has ``"Arches"``.
+    threads : int, optional
+        The maximum number of databases downloaded at once.
+
+    Returns
+    -------
+    RepoJobs
+        The databases being parsed, ``RepoJobs.result()`` waits for them.
+
+    Raises
+    ------
+    ValueError
+        If ``repoPath`` doesn't contain ``%(arch)s`` while a repository has
+        ``"Arches"``.
+
+    """
+    jobs = []
+    for repo in repos:
+        for arch in repo.get("Arches") or [None]:
+            # Check the path before anything is downloaded
+            databaseUrl(mirror, repo["Name"], arch, repoPath)
+            jobs.append((repo["Name"], arch))
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(threads, len(jobs))))
+    futures = []
+    for repo, arch in jobs:
+        messages = []
+        futures.append((repoLabel(repo, arch), messages,
+                        executor.submit(_parseHeld, messages, mirror, stream, repo, arch, repoPath)))
+
+    return RepoJobs(executor, futures)
+
+
+def parseRepos(mirror, repos, stream=False, repoPath=defaultRepoPath, threads=4):
+    """
+    Parse the databases of several repositories at the same time, and wait for
+    all of them. See ``startRepos()`` and ``RepoJobs.result()``.
+
+    Parameters
+    ----------
+    mirror : str
+        URL of the mirror to download the databases from. URL most contain a
+        valid web protocol such as ``http://`` or ``https://``
+    repos : list
+        List of repositories as set in the ``Repos`` configuration.
+    stream : bool, optional
+        True to parse the databases while they download, see
+        ``parsePackages()``.
+    repoPath : str, optional
+        Path of the databases on the mirror, see ``databaseUrl()``.
+    threads : int, optional
+        The maximum number of databases downloaded at once.
+
+    Returns
+    -------
+    dict
+        Dictionary with the label of every repository as keys, and their
+        ``PackageIndex`` as values.
+
+    Raises
+    ------
+    ValueError
+        If ``repoPath`` doesn't contain ``%(arch)s`` while a repository has
+        ``"Arches"``.
+
+    """
+    return startRepos(mirror, repos, stream, repoPath, threads).result()
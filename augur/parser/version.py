@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import re
+
+from augur.display import profiler
+
+# Only ASCII characters count as part of a version segment, just like the
+# C locale character classes pacman uses.
+_digits = re.compile(r"[0-9]+")
+_alphas = re.compile(r"[A-Za-z]+")
+_separators = re.compile(r"[^A-Za-z0-9]*")
+_epoch = re.compile(r"[0-9]*")
+
+
+def _isAlpha(char):
+    return ("a" <= char <= "z") or ("A" <= char <= "Z")
+
+
+def _parseEvr(evr):
+    """
+    Split a full version string into its epoch, version and release. Mirrors
+    ``parseEVR()`` from libalpm, so a missing epoch is always ``"0"`` and a
+    missing release is None.
+
+    Parameters
+    ----------
+    evr : str
+        Full version string in the form ``[epoch:]pkgver[-pkgrel]``.
+
+    Returns
+    -------
+    tuple
+        The epoch, version and release of the package, in that order.
+
+    """
+    epochEnd = _epoch.match(evr).end()
+
+    if evr[epochEnd:epochEnd + 1] == ":":
+        epoch = evr[:epochEnd] or "0"
+        rest = evr[epochEnd + 1:]
+    else:
+        epoch = "0"
+        rest = evr
+
+    version, separator, release = rest.rpartition("-")
+    if not separator:
+        return epoch, rest, None
+
+    return epoch, version, release
+
+
+def rpmvercmp(a, b):
+    """
+    Compare two version segments the same way ``rpmvercmp()`` in libalpm does.
+    Both strings are walked in runs of digits or letters, with anything else
+    treated as a separator. Numeric runs are compared by value, alpha runs are
+    compared lexically, and a numeric run is always newer than an alpha one.
+
+    Parameters
+    ----------
+    a : str
+        First version segment.
+    b : str
+        Second version segment.
+
+    Returns
+    -------
+    int
+        -1 if ``a`` is older than ``b``, 0 if they are equal and 1 if ``a`` is
+        newer than ``b``.
+
+    """
+    if a == b:
+        return 0
+
+    lenA = len(a)
+    lenB = len(b)
+    one = ptr1 = 0
+    two = ptr2 = 0
+
+    while one < lenA and two < lenB:
+        one = _separators.match(a, one).end()
+        two = _separators.match(b, two).end()
+
+        # Ran out of either string, we are done with the loop
+        if one >= lenA or two >= lenB:
+            break
+
+        # Separators of a different length decide the comparison
+        if one - ptr1 != two - ptr2:
+            return -1 if one - ptr1 < two - ptr2 else 1
+
+        # Grab the next run, using the type of the first string's run
+        isNum = a[one].isdigit()
+        segment = _digits if isNum else _alphas
+        ptr1 = segment.match(a, one).end()
+        match = segment.match(b, two)
+        ptr2 = match.end() if match else two
+
+        # Runs of different types, numeric always wins
+        if two == ptr2:
+            return 1 if isNum else -1
+
+        runA = a[one:ptr1]
+        runB = b[two:ptr2]
+        if isNum:
+            runA = runA.lstrip("0")
+            runB = runB.lstrip("0")
+            if len(runA) != len(runB):
+                return 1 if len(runA) > len(runB) else -1
+
+        if runA != runB:
+            return 1 if runA > runB else -1
+
+        one = ptr1
+        two = ptr2
+
+    if one >= lenA and two >= lenB:
+        return 0
+
+    # A remaining alpha run never beats an empty string
+    if (one >= lenA and not _isAlpha(b[two])) or (one < lenA and _isAlpha(a[one])):
+        return -1
+    return 1
+
+
+def vercmp(winry, aur):
+    """
+    Compare two full package versions in process, giving the same results as
+    pacman's ``vercmp`` utility. The epoch is compared first, then the pkgver
+    and finally the pkgrel when both versions have one.
+
+    Parameters
+    ----------
+    winry : str
+        Version of the first package, usually Winry's package version.
+    aur : str
+        Version of the second package, usually the AUR version.
+
+    Returns
+    -------
+    int
+        The result of the comparison. The meaning of the numbers are as
+        follows::
+
+            -1 : if winry < aur
+             0 : if winry == aur
+             1 : if winry > aur
+
+    """
+    if winry == aur:
+        return 0
+
+    epochA, versionA, releaseA = _parseEvr(winry)
+    epochB, versionB, releaseB = _parseEvr(aur)
+
+    result = rpmvercmp(epochA, epochB)
+    if result == 0:
+        result = rpmvercmp(versionA, versionB)
+        if result == 0 and releaseA is not None and releaseB is not None:
+            result = rpmvercmp(releaseA, releaseB)
+
+    return result
+
+
+def vercmpMany(pairs):
+    """
+    Compare a whole list of version pairs in one call. Pairs that show up more
+    than once are only compared the first time.
+
+    Parameters
+    ----------
+    pairs : iterable
+        Iterable of ``(winry, aur)`` version tuples to be compared with
+        ``vercmp()``.
+
+    Returns
+    -------
+    list
+        List of -1, 0 or 1 results, in the same order as ``pairs``.
+
+    """
+    seen = {}
+    results = []
+    for pair in pairs:
+        if pair not in seen:
+            seen[pair] = vercmp(pair[0], pair[1])
+        results.append(seen[pair])
+
+    profiler.count("comparisons_run", len(seen))
+    return results
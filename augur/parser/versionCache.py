@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+from collections import OrderedDict
+from os import path, replace
+from pickle import load as pickleLoad, dump as pickleDump, HIGHEST_PROTOCOL
+
+from augur.configuration import configure
+
+
+def versionCachePath():
+    """
+    Find the path of the version comparison cache. The cache lives next to the
+    AUR package cache at ``$XDG_CACHE_HOME/augur/versions.cache``.
+
+    Returns
+    -------
+    str
+        The full path to the user's version comparison cache.
+
+    """
+    cachePath = configure.loadXDGVars()["xdgCache"]
+
+    return "%(cachePath)s/augur/versions.cache" % locals()
+
+
+def readVersionCache():
+    """
+    Read the cache of previous version comparisons. The cache is stored as a
+    pickled list of ``(winry, aur, result)`` entries, from least to most
+    recently used, and is loaded into an OrderedDict so the order can be kept
+    up to date. A pickle is used rather than YAML, as loading and dumping YAML
+    took several times longer than comparing every version again, while the
+    pickle is read several times faster, see ``benchmarks/versionCache.py``. An
+    unreadable or broken cache is ignored, since it can always be rebuilt.
+
+    Returns
+    -------
+    OrderedDict
+        Dictionary with ``(winry, aur)`` version tuples as keys, and the result
+        of comparing them as values.
+
+    """
+    cacheFile = versionCachePath()
+
+    cache = OrderedDict()
+    if path.isfile(cacheFile):
+        try:
+            with open(cacheFile, "rb") as file:
+                for winry, aur, result in pickleLoad(file):
+                    cache[(winry, aur)] = result
+        except Exception as e:
+            print("=> Error! Version cache not readable, ignoring it.")
+            cache.clear()
+
+    return cache
+
+
+def writeVersionCache(cache, maxSize=10000):
+    """
+    Write the cache of version comparisons back to disk. Only the ``maxSize``
+    most recently used entries are kept, the rest are evicted. The cache is
+    written to a temporary file first and then moved into place, so a failed
+    write never leaves a truncated cache behind.
+
+    Parameters
+    ----------
+    cache : OrderedDict
+        The cache of version comparisons, as returned by ``readVersionCache()``
+        and updated by ``cachedVercmp()``.
+    maxSize : int, optional
+        The maximum number of comparisons to keep in the cache.
+
+    Returns
+    -------
+    bool
+        True if the cache was written, otherwise False.
+
+    """
+    cacheFile = versionCachePath()
+
+    # Evict the least recently used comparisons
+    while len(cache) > maxSize:
+        cache.popitem(last=False)
+
+    entries = [(winry, aur, result) for (winry, aur), result in cache.items()]
+    try:
+        with open("%(cacheFile)s.tmp" % locals(), "wb") as file:
+            pickleDump(entries, file, protocol=HIGHEST_PROTOCOL)
+        replace("%(cacheFile)s.tmp" % locals(), cacheFile)
+    except (IOError, OSError) as e:
+        print("=> Error! Could not write to version cache.")
+        return False
+
+    return True
+
+
+def cachedVercmp(cache, pairs, vercmpMany):
+    """
+    Compare a list of version pairs, using the cache for any pair that has been
+    compared before. Only the pairs missing from the cache are handed off to
+    ``vercmpMany``, and their results are added to the cache. Every pair that is
+    looked up is marked as the most recently used.
+
+    Parameters
+    ----------
+    cache : OrderedDict
+        The cache of version comparisons, as returned by ``readVersionCache()``.
+    pairs : list
+        List of ``(winry, aur)`` version tuples to be compared.
+    vercmpMany : function
+        Function comparing a list of version tuples in one call, such as
+        ``version.vercmpMany()``.
+
+    Returns
+    -------
+    list
+        List of -1, 0 or 1 results, in the same order as ``pairs``.
+
+    """
+    # Compare whatever hasn't been seen before
+    missing = [pair for pair in pairs if pair not in cache]
+    for pair, result in zip(missing, vercmpMany(missing)):
+        cache[pair] = result
+
+    results = []
+    for pair in pairs:
+        cache.move_to_end(pair)
+        results.append(cache[pair])
+
+    return results
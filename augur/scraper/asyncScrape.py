@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+from sys import stdout
+from time import monotonic, time
+
+from augur.display import profiler
+from augur.network import client
+from augur.scraper import scrape
+
+
+class TokenBucket:
+    """
+    Token bucket limiting how often requests are started. The bucket refills at
+    ``rate`` tokens a second up to ``burst`` tokens, and every request takes a
+    token, waiting for one to be refilled if the bucket is empty. Has to be
+    created inside the event loop it's used in.
+
+    Parameters
+    ----------
+    rate : float
+        The number of requests allowed per second, on average.
+    burst : int, optional
+        The number of requests that can be started back to back after the
+        bucket has had time to fill up.
+
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """
+        Take a token from the bucket, waiting until one is available.
+
+        """
+        async with self.lock:
+            while True:
+                now = monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+async def _scrapePages(webpath, perPage, rate, concurrency):
+    # Fetch every page of the search, within the request budget
+    loop = asyncio.get_running_loop()
+    http = client.getClient()
+    bucket = TokenBucket(rate)
+    inFlight = asyncio.Semaphore(concurrency)
+
+    with ThreadPoolExecutor(max_workers=concurrency + 1) as executor:
+        async def fetch(start):
+            async with inFlight:
+                await bucket.acquire()
+                response = await loop.run_in_executor(executor, http.get, webpath % locals())
+                profiler.count("aur_pages_fetched")
+
+            # Parse outside of the semaphore, so the next request can go out
+            return await loop.run_in_executor(executor, scrape.parsePage, response.body)
+
+        # The first page says how many pages there are
+        async with inFlight:
+            await bucket.acquire()
+            start = 0
+            initialDownload = (await loop.run_in_executor(executor, http.get, webpath % locals())).body
+            profiler.count("aur_pages_fetched")
+        pagesTotal = scrape.parsePageCount(initialDownload)
+        packages = scrape.parsePage(initialDownload)
+
+        pending = [fetch((page - 1) * perPage) for page in range(2, pagesTotal + 1)]
+        for pagesDone, page in enumerate(asyncio.as_completed(pending), 2):
+            packages.update(await page)
+            stdout.write("\r    => Scraped page %(pagesDone)s of %(pagesTotal)s" % locals())
+            stdout.flush()
+
+    return packages
+
+
+def scrapeAurAsync(aurUrl, cacheFile, perPage=250, rate=1.0, concurrency=2):
+    """
+    Scrape a list of packages and versions from the AUR, the same way as
+    ``scrape.scrapeAur()``, but keep several requests going at once. The
+    scrape is still throttled, requests are started no faster than ``rate`` a
+    second as enforced by a ``TokenBucket``, and no more than ``concurrency``
+    are ever waiting on the AUR at the same time. This keeps the load on the
+    AUR servers where it is, while the time spent waiting on one response is
+    used to fetch and parse the others. Runs on asyncio, with the requests
+    themselves made by the shared ``client.HttpClient`` on worker threads.
+
+    Parameters
+    ----------
+    aurUrl : str
+        The URL of the AUR with a valid web protocol specified, such as
+        ``https://`` or ``http://``. Do not a leading forward slash.
+    cacheFile : str
+        The path to the user's local cache file. Should be a full path.
+    perPage : int, optional
+        The ammount of packages per page to request for scraping. Should for most
+        purposes be left alone, but can be changed to 50, 100, 250.
+    rate : float, optional
+        The maximum number of requests started per second.
+    concurrency : int, optional
+        The maximum number of requests in flight at the same time.
+
+    Returns
+    -------
+    bool
+        This will return True if finished scraping and was able to dump to a
+        cache file, but otherwise False.
+
+    """
+    print("=> Now scraping the packages from the AUR")
+    startTime = time()
+
+    webpath = "%(aurUrl)s/packages/?O=%%(start)s&C=0&SeB=nd&SB=n&SO=a&PP=%(perPage)s&do_Search=Go" % locals()
+    packages = asyncio.run(_scrapePages(webpath, perPage, rate, concurrency))
+
+    stdout.write("\r    => Finished scraping.           \n")
+
+    # Write contents to cache
+    print("=> Dumping scrape to cache.")
+    if not scrape.dumpCache(packages, cacheFile):
+        return False
+    scrape.writeTimestamp(cacheFile, startTime)
+
+    # Finished
+    print("=> Update complete.")
+    return True
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import re
+
+from time import time
+
+from contextlib import contextmanager
+from gzip import GzipFile
+from io import TextIOWrapper
+from urllib.parse import urlsplit
+
+from augur.network import client
+from augur.scraper import scrape
+
+# Whitespace and commas between the objects of the metadata array
+_separators = re.compile(r"[\s,]*")
+
+
+@contextmanager
+def openSource(metaUrl):
+    """
+    Open the metadata archive for reading, wherever it comes from. URLs with a
+    web protocol are streamed with the shared ``client.HttpClient``, while
+    ``file://`` URLs and plain paths are opened from the local disk. Gzipped
+    archives are decompressed on the fly, whatever their name.
+
+    Parameters
+    ----------
+    metaUrl : str
+        URL or path of the metadata archive.
+
+    Yields
+    ------
+    io.TextIOWrapper
+        The decompressed archive, as text.
+
+    """
+    parts = urlsplit(metaUrl)
+    if parts.scheme in ("http", "https"):
+        source = client.getClient().stream(metaUrl)
+    else:
+        source = open(parts.path if parts.scheme == "file" else metaUrl, "rb")
+
+    with source as raw:
+        if raw.peek(2)[:2] == b"\x1f\x8b":
+            raw = GzipFile(fileobj=raw)
+        yield TextIOWrapper(raw, encoding="utf-8")
+
+
+def iterMetadata(text, chunkSize=65536):
+    """
+    Parse a JSON array of package metadata one object at a time. The text is
+    read in chunks, and every object is handed out as soon as it has been read
+    in full, so only a single chunk of the array is ever held in memory.
+
+    Parameters
+    ----------
+    text : file
+        Text file object the JSON array is read from.
+    chunkSize : int, optional
+        The number of characters read from the file at a time.
+
+    Yields
+    ------
+    dict
+        The metadata of each package in the array.
+
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+
+    while True:
+        chunk = text.read(chunkSize)
+        buffer += chunk
+
+        position = _separators.match(buffer).end()
+        if not started and position < len(buffer):
+            if buffer[position] != "[":
+                raise ValueError("Metadata is not a JSON array")
+            position += 1
+            started = True
+
+        while True:
+            position = _separators.match(buffer, position).end()
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                entry, position = decoder.raw_decode(buffer, position)
+            except ValueError:
+                # The object continues in the next chunk
+                break
+            yield entry
+
+        if not chunk:
+            raise ValueError("Metadata ended before the end of the array")
+        buffer = buffer[position:]
+
+
+def fetchMetadata(metaUrl, cacheFile):
+    """
+    Build the cache of AUR packages and versions from the AUR's metadata
+    archive, rather than scraping the package search. The whole archive is a
+    single gzipped JSON array, such as ``packages-meta-v1.json.gz``, so it only
+    takes one request. It's parsed as a stream with ``iterMetadata()`` while it
+    downloads, and written to the same cache as ``scrape.scrapeAur()``.
+
+    Parameters
+    ----------
+    metaUrl : str
+        The URL of the metadata archive with a valid web protocol specified,
+        such as ``https://`` or ``http://``. Can also be a ``file://`` URL or
+        a path to a local copy of the archive.
+    cacheFile : str
+        The path to the user's local cache file. Should be a full path.
+
+    Returns
+    -------
+    bool
+        This will return True if finished reading the archive and was able to
+        dump to a cache file, but otherwise False.
+
+    """
+    print("=> Now downloading the package metadata from the AUR")
+    startTime = time()
+
+    packages = {}
+    with openSource(metaUrl) as text:
+        for entry in iterMetadata(text):
+            if entry.get("Name") and entry.get("Version"):
+                packages[entry["Name"]] = entry["Version"]
+
+    print("=> Read %s packages from the metadata." % len(packages))
+
+    # Write contents to cache
+    print("=> Dumping metadata to cache.")
+    if not scrape.dumpCache(packages, cacheFile):
+        return False
+    scrape.writeTimestamp(cacheFile, startTime)
+
+    # Finished
+    print("=> Update complete.")
+    return True
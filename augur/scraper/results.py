@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import re
+
+from html import unescape
+from html.parser import HTMLParser
+
+# The last number in the pkglist-stats summary is the number of pages
+_pageCount = re.compile(r"(\d+)\D*$")
+
+# Patterns for pulling the name and version cells straight out of the page
+_resultsTable = re.compile(r"<table\b[^>]*\bclass=\"[^\"]*\bresults\b[^\"]*\"[^>]*>.*?<tbody\b[^>]*>(.*?)</tbody>", re.S)
+_resultsRow = re.compile(r"<tr\b[^>]*>\s*<td\b[^>]*>(.*?)</td>\s*<td\b[^>]*>(.*?)</td>", re.S)
+_statsDiv = re.compile(r"<div\b[^>]*\bclass=\"[^\"]*\bpkglist-stats\b[^\"]*\"[^>]*>(.*?)</div>", re.S)
+_tags = re.compile(r"<[^>]*>")
+
+
+class ResultsParser(HTMLParser):
+    """
+    Event based parser for a page of the AUR's package search. Rather than
+    building a tree of the whole page, it only follows the ``results`` table
+    and the ``pkglist-stats`` summary, and keeps the text of just the cells
+    that are asked for. Feed it the page with ``feed()``, and then read the
+    results from its attributes.
+
+    Parameters
+    ----------
+    columns : tuple, optional
+        The indexes of the cells to keep from every row of the table. The
+        defaults are the name and version cells. None keeps every cell.
+
+    Attributes
+    ----------
+    headers : list
+        The text of every header cell of the table.
+    rows : list
+        A list of the kept cells of every row in the table body. Cells that
+        weren't kept are None.
+    stats : str
+        The text of the ``pkglist-stats`` summary, or None if there isn't one.
+
+    """
+
+    def __init__(self, columns=(0, 1)):
+        super().__init__()
+        self.columns = columns
+        self.headers = []
+        self.rows = []
+        self.stats = None
+
+        self.tableDepth = 0
+        self.inBody = False
+        self.cell = None
+        self.cellIndex = -1
+        self.statsDepth = 0
+        self.text = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            if self.tableDepth or "results" in (dict(attrs).get("class") or "").split():
+                self.tableDepth += 1
+        elif tag == "div":
+            if self.statsDepth or (self.stats is None and "pkglist-stats" in (dict(attrs).get("class") or "").split()):
+                self.statsDepth += 1
+                self.text = []
+        elif not self.tableDepth:
+            return
+        elif tag == "tbody":
+            self.inBody = True
+        elif tag == "tr" and self.inBody:
+            self.rows.append([])
+            self.cellIndex = -1
+        elif tag == "th" and not self.inBody:
+            self.text = []
+            self.cell = "th"
+        elif tag == "td" and self.inBody and self.rows:
+            self.cellIndex += 1
+            if self.columns is None or self.cellIndex in self.columns:
+                self.text = []
+                self.cell = "td"
+
+    def handle_endtag(self, tag):
+        if tag == "table" and self.tableDepth:
+            self.tableDepth -= 1
+        elif tag == "div" and self.statsDepth:
+            self.statsDepth -= 1
+            if not self.statsDepth:
+                self.stats = "".join(self.text)
+                self.text = None
+        elif tag == "tbody":
+            self.inBody = False
+        elif tag == "th" and self.cell == "th":
+            self.headers.append("".join(self.text).strip())
+            self.text = None
+            self.cell = None
+        elif tag == "td" and self.cell == "td":
+            row = self.rows[-1]
+            row.extend([None] * (self.cellIndex - len(row)))
+            row.append("".join(self.text))
+            self.text = None
+            self.cell = None
+
+    def handle_data(self, data):
+        if self.text is not None:
+            self.text.append(data)
+
+
+def _cellText(cell):
+    # Drop any markup inside the cell, such as the link around the name
+    if "<" in cell:
+        cell = _tags.sub("", cell)
+    if "&" in cell:
+        cell = unescape(cell)
+
+    return cell
+
+
+def extractPackages(page):
+    """
+    Pull the names and versions out of the ``results`` table of a page of the
+    AUR's package search, without parsing the rest of the page. The table body
+    is found and matched row by row with compiled patterns, only looking at the
+    first two cells of each row. This is much faster than ``ResultsParser``, but
+    can't do anything beyond that.
+
+    Parameters
+    ----------
+    page : bytes
+        The HTML of a page of the package search.
+
+    Returns
+    -------
+    dict
+        Dictionary with the names of the packages on the page as keys, and
+        their versions as values.
+
+    Raises
+    ------
+    ValueError
+        If the page has no ``results`` table, such as an error page or a page
+        with a different layout, so it's never mistaken for an empty page.
+
+    """
+    if isinstance(page, bytes):
+        page = page.decode("utf-8", "replace")
+
+    table = _resultsTable.search(page)
+    if not table:
+        raise ValueError("Page has no results table")
+
+    return {_cellText(name): _cellText(version) for name, version in _resultsRow.findall(table.group(1))}
+
+
+def extractStats(page):
+    """
+    Pull the text of the ``pkglist-stats`` summary out of a page of the AUR's
+    package search, without parsing the rest of the page.
+
+    Parameters
+    ----------
+    page : bytes
+        The HTML of a page of the package search.
+
+    Returns
+    -------
+    str
+        The text of the summary, or None if there isn't one.
+
+    """
+    if isinstance(page, bytes):
+        page = page.decode("utf-8", "replace")
+
+    stats = _statsDiv.search(page)
+    if not stats:
+        return None
+
+    return _cellText(stats.group(1))
+
+
+def parseResults(page, columns=(0, 1)):
+    """
+    Run a page of the AUR's package search through ``ResultsParser``.
+
+    Parameters
+    ----------
+    page : bytes
+        The HTML of a page of the package search.
+    columns : tuple, optional
+        The indexes of the cells to keep from every row, see ``ResultsParser``.
+
+    Returns
+    -------
+    ResultsParser
+        The parser, holding the headers, rows and summary of the page.
+
+    """
+    parser = ResultsParser(columns)
+    parser.feed(page.decode("utf-8", "replace") if isinstance(page, bytes) else page)
+    parser.close()
+
+    return parser
+
+
+def parsePageCount(stats):
+    """
+    Find the total number of pages from the text of the ``pkglist-stats``
+    summary, such as ``90000 packages found. Page 1 of 360.``
+
+    Parameters
+    ----------
+    stats : str
+        The text of the summary.
+
+    Returns
+    -------
+    int
+        The total number of pages.
+
+    """
+    return int(_pageCount.search(stats.strip()).group(1))
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import json
+
+from sys import stdout
+from urllib.parse import urlencode
+
+from augur.network import client
+from augur.scraper import scrape
+
+
+def queryInfo(rpcUrl, names):
+    """
+    Look up a batch of packages with a single AUR RPC ``info`` query. Every
+    package name is passed as its own ``arg[]``.
+
+    Parameters
+    ----------
+    rpcUrl : str
+        The URL of the AUR RPC endpoint with a valid web protocol specified,
+        such as ``https://aur.archlinux.org/rpc/``.
+    names : list
+        The names of the packages to look up.
+
+    Returns
+    -------
+    dict
+        Dictionary of the packages that were found in the AUR. The names of the
+        packages are the keys, with their versions as values. None if the RPC
+        answered with an error.
+
+    """
+    query = urlencode([("v", 5), ("type", "info")] + [("arg[]", name) for name in names])
+    response = json.loads(client.getClient().get("%(rpcUrl)s?%(query)s" % locals()).body.decode("utf-8"))
+
+    if response.get("type") == "error":
+        error = response.get("error")
+        print("\n=> Error! AUR RPC query failed: %(error)s" % locals())
+        return None
+
+    return {result["Name"]: result["Version"] for result in response.get("results", [])}
+
+
+def fetchInfo(rpcUrl, names, cacheFile, batchSize=150):
+    """
+    Build the cache of AUR packages and versions for only the packages that are
+    given, rather than every package in the AUR. The packages are looked up in
+    batches of ``batchSize`` with ``queryInfo()``, so a few thousand packages
+    only take a few dozen requests. Packages that aren't in the AUR are simply
+    left out of the cache. Writes to the same cache as ``scrape.scrapeAur()``.
+
+    Parameters
+    ----------
+    rpcUrl : str
+        The URL of the AUR RPC endpoint with a valid web protocol specified,
+        such as ``https://aur.archlinux.org/rpc/``.
+    names : iterable
+        The names of the packages to look up, usually every package in the
+        Winry repositories as loaded by ``parseRepo.parseRepos()``.
+    cacheFile : str
+        The path to the user's local cache file. Should be a full path.
+    batchSize : int, optional
+        The number of packages looked up in every request. Too many will make
+        the URL longer than the AUR accepts.
+
+    Returns
+    -------
+    bool
+        This will return True if every batch was looked up and was able to dump
+        to a cache file, but otherwise False.
+
+    """
+    print("=> Now looking up the packages in the AUR")
+
+    names = sorted(set(names))
+    batchesTotal = (len(names) + batchSize - 1) // batchSize
+
+    packages = {}
+    for batch in range(batchesTotal):
+        stdout.write("\r    => Looking up batch %s of %s" % (batch + 1, batchesTotal))
+        stdout.flush()
+
+        results = queryInfo(rpcUrl, names[batch * batchSize:(batch + 1) * batchSize])
+        if results is None:
+            return False
+        packages.update(results)
+
+    stdout.write("\r    => Finished looking up %s packages.           \n" % len(packages))
+
+    # Write contents to cache
+    print("=> Dumping lookup to cache.")
+    if not scrape.dumpCache(packages, cacheFile):
+        return False
+
+    # Finished
+    print("=> Update complete.")
+    return True
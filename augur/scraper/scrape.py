@@ -17,11 +17,166 @@
 #   You should have received a copy of the GNU General Public License
 #   along with Augur. If not, see <http://www.gnu.org/licenses/>.
 
-import urllib.request
-
+from calendar import timegm
+from os import path
+from queue import Queue
 from sys import stdout
-from bs4 import BeautifulSoup
-from yaml import dump, CDumper as Dumper
+from threading import Thread
+from time import perf_counter, strptime, time
+from yaml import load, dump, CDumper as Dumper, CLoader as Loader
+
+from augur.configuration import binaryCache
+from augur.display import profiler
+from augur.network import client
+from augur.scraper import results
+
+
+def dumpCache(packages, cacheFile):
+    """
+    Write a dictionary of AUR packages and versions to the cache. The cache is
+    written in the format of ``binaryCache.BinaryCache``.
+
+    Parameters
+    ----------
+    packages : dict
+        Dictionary with the names of the packages as keys, and their versions as
+        values.
+    cacheFile : str
+        The path to the user's local cache file. Should be a full path.
+
+    Returns
+    -------
+    bool
+        True if the cache was written, otherwise False.
+
+    """
+    try:
+        binaryCache.writeBinaryCache(packages, cacheFile)
+    except (IOError, OSError) as e:
+        print("=> Error! Could not write to cache.")
+        return False
+
+    return True
+
+
+def readTimestamp(cacheFile):
+    """
+    Read the time the cache was last updated with a full scrape of the AUR. The
+    time is stored in ``scrape.yaml`` next to the cache.
+
+    Parameters
+    ----------
+    cacheFile : str
+        The path to the user's local cache file. Should be a full path.
+
+    Returns
+    -------
+    float
+        The time of the last full update in seconds since the epoch, or None if
+        it isn't known.
+
+    """
+    stateFile = path.join(path.dirname(cacheFile), "scrape.yaml")
+
+    state = {}
+    if path.isfile(stateFile):
+        try:
+            with open(stateFile, "r") as file:
+                state = load(file, Loader=Loader) or {}
+        except IOError as e:
+            print("=> Error! Scrape state not readable.")
+
+    return state.get("Updated")
+
+
+def writeTimestamp(cacheFile, timestamp):
+    """
+    Store the time the cache was updated, so the next incremental update knows
+    where to stop. See ``readTimestamp()``.
+
+    Parameters
+    ----------
+    cacheFile : str
+        The path to the user's local cache file. Should be a full path.
+    timestamp : float
+        The time the update started, in seconds since the epoch.
+
+    Returns
+    -------
+    bool
+        True if the time was written, otherwise False.
+
+    """
+    stateFile = path.join(path.dirname(cacheFile), "scrape.yaml")
+
+    try:
+        with open(stateFile, "w") as file:
+            dump({"Updated": timestamp}, file, encoding="utf-8", default_flow_style=False, Dumper=Dumper)
+    except IOError as e:
+        print("=> Error! Could not write scrape state.")
+        return False
+
+    return True
+
+
+def parsePageCount(page):
+    """
+    Find the total number of pages in the AUR's package search, from the
+    ``pkglist-stats`` summary of any one of the pages.
+
+    Parameters
+    ----------
+    page : bytes
+        The HTML of a page of the package search.
+
+    Returns
+    -------
+    int
+        The total number of pages.
+
+    """
+    return results.parsePageCount(results.extractStats(page))
+
+
+def parsePage(page):
+    """
+    Parse the packages and versions out of the ``results`` table of a page of
+    the AUR's package search. Uses ``results.extractPackages()``, which only
+    looks at the name and version cells.
+
+    Parameters
+    ----------
+    page : bytes
+        The HTML of a page of the package search.
+
+    Returns
+    -------
+    dict
+        Dictionary with the names of the packages on the page as keys, and
+        their versions as values.
+
+    """
+    start = perf_counter()
+    packages = results.extractPackages(page)
+    profiler.observe("page_parse_seconds", perf_counter() - start)
+    profiler.count("aur_pages_parsed")
+
+    return packages
+
+
+def _parsePages(pagesQueue, packages, errors):
+    # Parse pages off the queue until None comes through
+    while True:
+        page = pagesQueue.get()
+        if page is None:
+            return
+
+        # Keep emptying the queue after an error, so the downloads don't block
+        if not errors:
+            try:
+                packages.update(parsePage(page))
+            except Exception as e:
+                errors.append(e)
 
 
 def scrapeAur(aurUrl, cacheFile, perPage=250):
@@ -31,14 +186,18 @@ def scrapeAur(aurUrl, cacheFile, perPage=250):
     versions. There is no current API to fetch a list of both package names and
     versions, so currently this is the only way to do this. To speed it up, the
     ammount per page is set at the highest value, 250, but if for some reason
-    you would want to use less you could lower it. Does use CDumper vs. PyYAML
-    default Dumper.
+    you would want to use less you could lower it. Pages are fetched with the
+    shared ``client.HttpClient``, so the whole scrape reuses the same
+    connection. The cache is written with ``dumpCache()``.
 
     Currently this process takes quite a while to complete, and some optimization
-    could perhaps be done, but it's intentional that this isn't multi-threaded.
-    As it stands this already puts quite a burden on AUR servers, and any effort
-    to increase the ammount of requests over a period of time would only
-    exasperate this.
+    could perhaps be done, but it's intentional that only one request is made at
+    a time. As it stands this already puts quite a burden on AUR servers, and
+    any effort to increase the ammount of requests over a period of time would
+    only exasperate this. Parsing does happen on a separate thread though, so
+    the next page is downloading while the last one is parsed, with a small
+    queue of pages in between. Once a page fails to parse, no more pages are
+    downloaded and the error is raised.
 
     Parameters
     ----------
@@ -59,41 +218,173 @@ def scrapeAur(aurUrl, cacheFile, perPage=250):
 
     """
     print("=> Now scraping the packages from the AUR")
+    startTime = time()
 
     # Define some variables to assist in the URL
     start = 0
     webpath = "%(aurUrl)s/packages/?O=%(start)s&C=0&SeB=nd&SB=n&SO=a&PP=%(perPage)s&do_Search=Go"
 
     # Download the total ammount of pages
-    initialDownload = urllib.request.urlopen(webpath % locals()).read()
-    soup = BeautifulSoup(initialDownload, "html.parser")
-    packagesQuant = soup.find("div", {"class": "pkglist-stats"})
+    http = client.getClient()
+    initialDownload = http.get(webpath % locals()).body
+    profiler.count("aur_pages_fetched")
+    pagesTotal = parsePageCount(initialDownload)
 
-    pagesTotal = int(packagesQuant.p.get_text().split(" ")[-1].replace("\t", "").replace(".", ""))
+    # Parse the pages on another thread while the next one downloads
+    pagesQueue = Queue(maxsize=2)
+    packages = {}
+    errors = []
+    parser = Thread(target=_parsePages, args=(pagesQueue, packages, errors))
+    parser.start()
 
     # Begin iterating to build the list of packages
+    try:
+        pagesQueue.put(initialDownload)
+        for page in range(2, pagesTotal + 1):
+            # Stop downloading once a page couldn't be parsed
+            if errors:
+                break
+
+            stdout.write("\r    => Scraping page %(page)s of %(pagesTotal)s" % locals())
+
+            start = (page - 1) * perPage
+            pagesQueue.put(http.get(webpath % locals()).body)
+            profiler.count("aur_pages_fetched")
+
+            stdout.flush()
+    finally:
+        pagesQueue.put(None)
+        parser.join()
+
+    if errors:
+        raise errors[0]
+
+    stdout.write("\r    => Finished scraping.           \n")
+
+    # Write contents to cache
+    print("=> Dumping scrape to cache.")
+    if not dumpCache(packages, cacheFile):
+        return False
+    writeTimestamp(cacheFile, startTime)
+
+    # Finished
+    print("=> Update complete.")
+    return True
+
+
+def parseUpdated(updated):
+    """
+    Parse the "Last Updated" column of the AUR's search results, such as
+    ``2017-06-01 12:34 (UTC)``.
+
+    Parameters
+    ----------
+    updated : str
+        The text of the column.
+
+    Returns
+    -------
+    float
+        The time the package was updated in seconds since the epoch.
+
+    """
+    return float(timegm(strptime(updated.strip()[:16], "%Y-%m-%d %H:%M")))
+
+
+def scrapeIncremental(aurUrl, cacheFile, perPage=250):
+    """
+    Update the cache with only the packages that changed since the last update.
+    The AUR's package search is sorted by the time the packages were last
+    updated, newest first, and scraped page by page until it reaches packages
+    that are older than the last update, as read by ``readTimestamp()``. The
+    changed packages are then merged into the existing cache. Packages that
+    were deleted from the AUR stay in the cache until the next full update with
+    ``scrapeAur()``.
+
+    Parameters
+    ----------
+    aurUrl : str
+        The URL of the AUR with a valid web protocol specified, such as
+        ``https://`` or ``http://``. Do not a leading forward slash.
+    cacheFile : str
+        The path to the user's local cache file. Should be a full path.
+    perPage : int, optional
+        The ammount of packages per page to request for scraping. Should for most
+        purposes be left alone, but can be changed to 50, 100, 250.
+
+    Returns
+    -------
+    bool
+        This will return True if finished scraping and was able to dump to a
+        cache file, but otherwise False.
+
+    """
+    print("=> Now scraping the changed packages from the AUR")
+    startTime = time()
+
+    # An incremental update can only follow a full one
+    lastUpdate = readTimestamp(cacheFile)
+    if lastUpdate is None or not path.isfile(cacheFile):
+        print("=> Error! No previous update found. Please do a full update first.")
+        return False
+
+    # Give packages updated in the same minute as the last update another look
+    lastUpdate -= 60
+
+    # Define some variables to assist in the URL
+    start = 0
+    webpath = "%(aurUrl)s/packages/?O=%(start)s&C=0&SeB=nd&SB=l&SO=d&PP=%(perPage)s&do_Search=Go"
+
+    # Begin iterating until reaching packages from before the last update
+    http = client.getClient()
     packages = {}
-    for page in range(1, pagesTotal):
-        stdout.write("\r    => Scraping page %(page)s of %(pagesTotal)s" % locals())
+    page = 1
+    finished = False
+    while not finished:
+        stdout.write("\r    => Scraping page %(page)s" % locals())
+
+        pageResults = results.parseResults(http.get(webpath % locals()).body, None)
+        profiler.count("aur_pages_fetched")
+        if not pageResults.rows:
+            break
 
-        packagesRaw = urllib.request.urlopen(webpath % locals()).read()
-        soup = BeautifulSoup(packagesRaw, "html.parser")
-        for tr in soup.find("table", {"class": "results"}).tbody.findAll("tr"):
-            packages[tr.findAll("td")[0].get_text()] = tr.findAll("td")[1].get_text()
+        # Find which column holds the last update time
+        if "Last Updated" not in pageResults.headers:
+            print("\n=> Error! The AUR doesn't list update times. Please do a full update instead.")
+            return False
+        updatedColumn = pageResults.headers.index("Last Updated")
+
+        rows = pageResults.rows
+        for row in rows:
+            if parseUpdated(row[updatedColumn]) < lastUpdate:
+                finished = True
+                break
+            packages[row[0]] = row[1]
+
+        if len(rows) < perPage:
+            finished = True
 
         start = page * perPage
+        page += 1
         stdout.flush()
 
-    stdout.write("\r    => Finished scraping.           \n")
+    stdout.write("\r    => Finished scraping, %s packages changed.           \n" % len(packages))
+
+    # Merge the changes into the current cache
+    try:
+        cache = binaryCache.BinaryCache(cacheFile)
+        cachedPackages = dict(cache.items())
+        cache.close()
+    except (IOError, ValueError) as e:
+        print("=> Error! Could not read the cache.")
+        return False
+    cachedPackages.update(packages)
 
     # Write contents to cache
     print("=> Dumping scrape to cache.")
-    try:
-        with open(cacheFile, "w") as cache:
-            dump(packages, cache, encoding="utf-8", default_flow_style=False, Dumper=Dumper)
-    except IOError as e:
-        print("=> Error! Could not write to cache.")
+    if not dumpCache(cachedPackages, cacheFile):
         return False
+    writeTimestamp(cacheFile, startTime)
 
     # Finished
     print("=> Update complete.")
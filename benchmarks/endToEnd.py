@@ -0,0 +1,401 @@
+#!/usr/bin/env python
+
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Benchmark augur's hot paths end to end, without touching the network. A
+synthetic pacman database and synthetic pages of AUR search results are
+generated for every size, and served from a local HTTP server in another
+process. Then ``scrape.scrapeAur()``, ``parseRepo.parsePackages()``,
+``load.loadAurCache()`` and ``compare.compare()`` are timed on their own, and
+their throughput and peak memory are written as JSON, so the results of
+different versions can be compared.
+
+Run from the root of the repository::
+
+    python benchmarks/endToEnd.py [--sizes 1000 10000 200000] [--repeat 3] [--output results.json]
+
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import tracemalloc
+
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from multiprocessing import Process, Queue
+from os import close, devnull, dup, dup2, environ, path, remove
+from time import perf_counter
+from urllib.parse import parse_qs, urlsplit
+
+root = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.insert(0, root)
+
+from augur.configuration import configure, load
+from augur.parser import compare, parseRepo
+from augur.scraper import scrape
+
+perPage = 250
+
+
+def buildPackages(size):
+    """
+    Make up the packages of the repository and the AUR. Every tenth package
+    has a newer version in the AUR, and every hundredth is only in the AUR.
+
+    Parameters
+    ----------
+    size : int
+        The number of packages in the AUR.
+
+    Returns
+    -------
+    tuple
+        Dictionaries of the Winry and AUR packages, with the names of the
+        packages as keys and their versions as values.
+
+    """
+    winry = {}
+    aur = {}
+    for i in range(size):
+        name = "package-%(i)s" % locals()
+        aur[name] = "1.%(i)s.%(minor)s-1" % {"i": i, "minor": 1 if i % 10 == 0 else 0}
+        if i % 100 != 99:
+            winry[name] = "1.%(i)s.0-1" % locals()
+
+    return winry, aur
+
+
+def buildDatabase(packages):
+    """
+    Build a pacman sync database in the same layout as the mirrors, a gzipped
+    tarball with a ``desc`` file in a directory for every package.
+
+    Parameters
+    ----------
+    packages : dict
+        The packages and versions in the database.
+
+    Returns
+    -------
+    bytes
+        The database.
+
+    """
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz", compresslevel=6) as database:
+        for name, version in packages.items():
+            directory = tarfile.TarInfo("%(name)s-%(version)s" % locals())
+            directory.type = tarfile.DIRTYPE
+            directory.mode = 0o755
+            database.addfile(directory)
+
+            desc = ("%%FILENAME%%\n%(name)s-%(version)s-x86_64.pkg.tar.xz\n\n%%NAME%%\n%(name)s\n\n"
+                    "%%BASE%%\n%(name)s\n\n%%VERSION%%\n%(version)s\n\n%%DESC%%\nA synthetic package\n\n"
+                    "%%ARCH%%\nx86_64\n\n" % locals()).encode("utf-8")
+            descInfo = tarfile.TarInfo("%(name)s-%(version)s/desc" % locals())
+            descInfo.size = len(desc)
+            database.addfile(descInfo, io.BytesIO(desc))
+
+    return buffer.getvalue()
+
+
+def buildPages(packages):
+    """
+    Build the pages of AUR search results for the packages, sorted by name
+    with ``perPage`` packages on a page, like ``scrape.scrapeAur()`` asks for.
+
+    Parameters
+    ----------
+    packages : dict
+        The packages and versions in the AUR.
+
+    Returns
+    -------
+    list
+        The HTML of every page, as bytes.
+
+    """
+    names = sorted(packages)
+    total = len(names)
+    pagesTotal = max(1, (total + perPage - 1) // perPage)
+
+    pages = []
+    for page in range(pagesTotal):
+        rows = []
+        for i, name in enumerate(names[page * perPage:(page + 1) * perPage]):
+            rows.append("<tr class=\"%(parity)s\">\n<td><a href=\"/packages/%(name)s/\">%(name)s</a></td>\n"
+                        "<td>%(version)s</td>\n<td>1</td>\n<td>0.10</td>\n"
+                        "<td class=\"wrap\">A synthetic package &amp; its description</td>\n"
+                        "<td><a href=\"/account/maintainer\">maintainer</a></td>\n"
+                        "<td>2017-06-01 12:34 (UTC)</td>\n</tr>\n"
+                        % {"parity": "odd" if i % 2 else "even", "name": name, "version": packages[name]})
+
+        number = page + 1
+        stats = ("<div class=\"pkglist-stats\"><p>\n\t%(total)s packages found.\n"
+                 "\tPage %(number)s of %(pagesTotal)s.\n</p></div>\n" % locals())
+        pages.append(("<!DOCTYPE html><html><head><title>AUR (en) - Packages</title></head><body>\n"
+                      "<div id=\"pkglist-results\" class=\"box\">\n%(stats)s<table class=\"results\">\n"
+                      "<thead><tr><th>Name</th><th>Version</th><th>Votes</th><th>Popularity</th>"
+                      "<th>Description</th><th>Maintainer</th><th>Last Updated</th></tr></thead>\n"
+                      "<tbody>\n%(rows)s</tbody>\n</table>\n%(stats)s</div></body></html>"
+                      % {"stats": stats, "rows": "".join(rows)}).encode("utf-8"))
+
+    return pages
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """
+    Serves the database at ``/winry-testing/winry-testing.db``, with an ETag so
+    it can be requested conditionally, and the pages of search results at
+    ``/packages/``, picking the page from the ``O`` offset.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/winry-testing/winry-testing.db":
+            # Answer conditional requests like a mirror would
+            if self.headers.get("If-None-Match") == self.server.etag:
+                self.send_response(304)
+                self.send_header("ETag", self.server.etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = self.server.database
+        elif url.path == "/packages/":
+            offset = int(parse_qs(url.query).get("O", ["0"])[0])
+            pages = self.server.pages
+            body = pages[min(offset // perPage, len(pages) - 1)]
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        if body is self.server.database:
+            self.send_header("ETag", self.server.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serveFixtures(database, pages, ports):
+    # Runs in its own process, so serving doesn't compete for the GIL
+    server = HTTPServer(("127.0.0.1", 0), FixtureHandler)
+    server.database = database
+    server.etag = "\"%s\"" % hashlib.md5(database).hexdigest()
+    server.pages = pages
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+@contextmanager
+def quietStdout():
+    """
+    Send everything written to stdout to ``/dev/null``, including what's
+    written through a reference to ``sys.stdout`` taken at import time, such as
+    the progress of ``scrape.scrapeAur()``.
+    """
+    sys.stdout.flush()
+    saved = dup(1)
+    with open(devnull, "w") as quiet:
+        dup2(quiet.fileno(), 1)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        dup2(saved, 1)
+        close(saved)
+
+
+def measure(function, repeat, setup=None):
+    """
+    Time a function, and then measure its peak memory in a separate run, so
+    tracing the memory doesn't slow down the timing.
+
+    Parameters
+    ----------
+    function : function
+        The function to measure, called without arguments.
+    repeat : int
+        How many times the function is timed, the best time is kept.
+    setup : function, optional
+        Called before every run, without being timed.
+
+    Returns
+    -------
+    dict
+        The best time in seconds as ``"seconds"``, the peak of the memory
+        allocated by the function in bytes as ``"peakMemory"``, and the peak
+        resident memory of the whole process in bytes as ``"maxRss"``.
+
+    """
+    times = []
+    with quietStdout():
+        for run in range(repeat):
+            if setup:
+                setup()
+            start = perf_counter()
+            function()
+            times.append(perf_counter() - start)
+
+        if setup:
+            setup()
+        tracemalloc.start()
+        function()
+        peakMemory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {"seconds": min(times), "peakMemory": peakMemory,
+            "maxRss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024}
+
+
+def benchmarkSize(size, repeat, cacheDir):
+    """
+    Generate and serve the fixtures for one size, and measure every phase.
+
+    Parameters
+    ----------
+    size : int
+        The number of AUR packages.
+    repeat : int
+        How many times every phase is timed.
+    cacheDir : str
+        The directory used as ``$XDG_CACHE_HOME``.
+
+    Returns
+    -------
+    list
+        A dictionary for every phase, see ``measure()``, with the name of the
+        phase, the number of packages and the throughput in packages a second.
+
+    """
+    winry, aur = buildPackages(size)
+    database = buildDatabase(winry)
+    pages = buildPages(aur)
+
+    ports = Queue()
+    server = Process(target=serveFixtures, args=(database, pages, ports), daemon=True)
+    server.start()
+    url = "http://127.0.0.1:%s" % ports.get()
+
+    with quietStdout():
+        cacheFile = configure.checkCache(False)
+    databaseFile = "%(cacheDir)s/augur/winry-testing.db" % locals()
+
+    def removeDatabase():
+        for suffix in ["", ".yaml", ".index"]:
+            if path.exists(databaseFile + suffix):
+                remove(databaseFile + suffix)
+
+    def scrapeAur():
+        scrape.scrapeAur(url, cacheFile, perPage)
+
+    def parsePackages():
+        parseRepo.parsePackages(url)
+
+    def streamPackages():
+        parseRepo.parsePackages(url, stream=True)
+
+    def compareAll():
+        compare.compare(winry, load.loadAurCache(), {"blacklist": []}, cacheSize=0)
+
+    phases = [("scrapeAur", scrapeAur, None, size),
+              ("parsePackages", parsePackages, removeDatabase, len(winry)),
+              ("parsePackages (indexed)", parsePackages, None, len(winry)),
+              ("parsePackages (stream)", streamPackages, None, len(winry)),
+              ("loadAurCache", load.loadAurCache, None, size),
+              ("compare", compareAll, None, len(winry))]
+
+    results = []
+    try:
+        for name, function, setup, packages in phases:
+            result = measure(function, repeat, setup)
+            result.update({"phase": name, "packages": packages,
+                           "throughput": packages / result["seconds"] if result["seconds"] else None})
+            results.append(result)
+            print("=> %7d %-24s %9.3f s %12.0f packages/s %8.1f MiB"
+                  % (size, name, result["seconds"], result["throughput"] or 0, result["peakMemory"] / 2 ** 20),
+                  file=sys.stderr)
+    finally:
+        server.terminate()
+
+    return [dict(result, size=size) for result in results]
+
+
+def gitCommit():
+    # The commit the benchmark ran on, if this is a git checkout
+    try:
+        commit = subprocess.run(["git", "-C", root, "rev-parse", "HEAD"], stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL)
+        return commit.stdout.decode("utf-8").strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    argParser = argparse.ArgumentParser(description="Benchmark augur end to end on synthetic packages.")
+    argParser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000],
+                           help="Numbers of AUR packages to benchmark with")
+    argParser.add_argument("--repeat", type=int, default=3, help="Runs timed for every phase")
+    argParser.add_argument("--output", type=str, default="-", help="File the JSON results are written to")
+    args = argParser.parse_args()
+
+    cacheDir = tempfile.mkdtemp(prefix="augur-benchmark-")
+    environ["XDG_CACHE_HOME"] = cacheDir
+
+    try:
+        results = []
+        for size in args.sizes:
+            results.extend(benchmarkSize(size, args.repeat, cacheDir))
+    finally:
+        shutil.rmtree(cacheDir)
+
+    report = {"date": datetime.utcnow().isoformat() + "Z",
+              "commit": gitCommit(),
+              "python": platform.python_version(),
+              "platform": platform.platform(),
+              "repeat": args.repeat,
+              "results": results}
+
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
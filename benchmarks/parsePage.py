@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Benchmark parsing a page of the AUR's package search. Times the
+``results.extractPackages()`` fast path that the scraper uses and the more
+general ``results.ResultsParser`` against the BeautifulSoup parsing they
+replaced, if bs4 is installed, on a synthetic page of results.
+
+Run from the root of the repository::
+
+    python benchmarks/parsePage.py [--rows 250] [--repeat 50]
+
+"""
+
+import argparse
+import sys
+
+from os import path
+from timeit import repeat
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from augur.scraper import results, scrape
+
+
+def buildPage(rows):
+    """
+    Build a page of search results looking like the AUR's, with ``rows``
+    packages in the ``results`` table.
+
+    Parameters
+    ----------
+    rows : int
+        The number of packages on the page.
+
+    Returns
+    -------
+    bytes
+        The HTML of the page.
+
+    """
+    row = ("<tr class=\"%(parity)s\">\n"
+           "<td><a href=\"/packages/package-%(i)s/\">package-%(i)s</a></td>\n"
+           "<td>1.%(i)s.0-1</td>\n"
+           "<td>%(i)s</td>\n"
+           "<td>0.%(i)s</td>\n"
+           "<td class=\"wrap\">A synthetic package &amp; its description, number %(i)s</td>\n"
+           "<td><a href=\"/account/maintainer\" title=\"View account information\">maintainer</a></td>\n"
+           "<td>2017-06-01 12:34 (UTC)</td>\n"
+           "</tr>\n")
+    body = "".join(row % {"i": i, "parity": "odd" if i % 2 else "even"} for i in range(rows))
+
+    return ("<!DOCTYPE html><html><head><title>AUR (en) - Packages</title></head><body>\n"
+            "<div id=\"pkglist-results\" class=\"box\">\n"
+            "<div class=\"pkglist-stats\"><p>\n\t90000 packages found.\n\tPage 1 of 360.\n</p></div>\n"
+            "<table class=\"results\">\n<thead><tr><th>Name</th><th>Version</th><th>Votes</th>"
+            "<th>Popularity</th><th>Description</th><th>Maintainer</th><th>Last Updated</th></tr></thead>\n"
+            "<tbody>\n%(body)s</tbody>\n</table>\n"
+            "<div class=\"pkglist-stats\"><p>\n\t90000 packages found.\n\tPage 1 of 360.\n</p></div>\n"
+            "</div></body></html>" % locals()).encode("utf-8")
+
+
+def parseSoup(page):
+    # The BeautifulSoup parsing scrapeAur used before ResultsParser
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page, "html.parser")
+    packages = {}
+    for tr in soup.find("table", {"class": "results"}).tbody.find_all("tr"):
+        packages[tr.find_all("td")[0].get_text()] = tr.find_all("td")[1].get_text()
+
+    return packages
+
+
+def parseEvents(page):
+    # The general event based parser, keeping only the name and version
+    return {name: version for name, version in results.parseResults(page).rows}
+
+
+def main():
+    argParser = argparse.ArgumentParser(description="Benchmark parsing a page of AUR search results.")
+    argParser.add_argument("--rows", type=int, default=250, help="Packages per page")
+    argParser.add_argument("--repeat", type=int, default=50, help="Pages parsed per timing")
+    args = argParser.parse_args()
+
+    page = buildPage(args.rows)
+    assert len(scrape.parsePage(page)) == args.rows
+    assert scrape.parsePageCount(page) == 360
+
+    assert parseEvents(page) == scrape.parsePage(page)
+
+    parsers = [("extractPackages", scrape.parsePage), ("ResultsParser", parseEvents)]
+    try:
+        import bs4
+        assert parseSoup(page) == scrape.parsePage(page)
+        parsers.append(("BeautifulSoup", parseSoup))
+    except ImportError:
+        print("=> bs4 not installed, only timing ResultsParser")
+
+    timings = {}
+    for name, parse in parsers:
+        best = min(repeat(lambda: parse(page), number=args.repeat, repeat=5)) / args.repeat
+        timings[name] = best
+        print("=> %-16s %8.2f ms per page" % (name, best * 1000))
+
+    if "BeautifulSoup" in timings:
+        for name in ["extractPackages", "ResultsParser"]:
+            print("=> %-16s %7.1fx faster than BeautifulSoup" % (name, timings["BeautifulSoup"] / timings[name]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Benchmark the startup time of the ``augur`` command. Runs the quick commands
+that scripts call over and over, such as ``-p``, ``-b`` and ``-w``, against a
+throwaway configuration and cache, and reports how long each one takes from
+start to exit. The time to start a bare interpreter is shown for reference.
+Like ``augur`` itself, this can't be ran as root.
+
+Run from the root of the repository::
+
+    python benchmarks/startup.py [--runs 20]
+
+"""
+
+import argparse
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from os import environ, geteuid, makedirs, path
+from time import perf_counter
+
+root = path.dirname(path.dirname(path.abspath(__file__)))
+
+
+def timeCommand(command, environment, runs):
+    """
+    Run a command ``runs`` times, timing each run.
+
+    Parameters
+    ----------
+    command : list
+        The command and its arguments.
+    environment : dict
+        The environment to run the command with.
+    runs : int
+        How many times to run the command.
+
+    Returns
+    -------
+    list
+        The time each run took, in seconds.
+
+    """
+    timings = []
+    for run in range(runs):
+        start = perf_counter()
+        subprocess.run(command, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(perf_counter() - start)
+
+    return timings
+
+
+def main():
+    argParser = argparse.ArgumentParser(description="Benchmark the startup time of augur.")
+    argParser.add_argument("--runs", type=int, default=20, help="Runs of every command")
+    args = argParser.parse_args()
+
+    if geteuid() == 0:
+        print("=> augur refuses to run as root, run the benchmark as a normal user")
+        exit(1)
+
+    # Set up a throwaway configuration and cache
+    home = tempfile.mkdtemp(prefix="augur-startup-")
+    makedirs(path.join(home, "config", "augur"))
+    makedirs(path.join(home, "cache", "augur"))
+    for name in ["blacklist.yaml", "configuration.yaml"]:
+        shutil.copy(path.join(root, "data", name), path.join(home, "config", "augur", name))
+
+    environment = dict(environ)
+    environment["XDG_CONFIG_HOME"] = path.join(home, "config")
+    environment["XDG_CACHE_HOME"] = path.join(home, "cache")
+    environment["PYTHONPATH"] = root
+
+    script = path.join(root, "augur", "augur")
+    commands = [
+        ("python", [sys.executable, "-c", "pass"]),
+        ("augur -p", [sys.executable, script, "-p"]),
+        ("augur -b", [sys.executable, script, "-b", "benchmark-package"]),
+        ("augur -w", [sys.executable, script, "-w", "benchmark-package"]),
+        ("augur -h", [sys.executable, script, "-h"])]
+
+    try:
+        for name, command in commands:
+            timings = timeCommand(command, environment, args.runs)
+            print("=> %-10s min %7.1f ms   median %7.1f ms" % (
+                name, min(timings) * 1000, statistics.median(timings) * 1000))
+    finally:
+        shutil.rmtree(home)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Benchmark the version cache against comparing every version again. Times
+``version.vercmpMany()`` on its own, and reading the pickled cache with
+``versionCache.readVersionCache()`` followed by ``versionCache.cachedVercmp()``
+when every pair is already cached, on synthetic version pairs looking like the
+ones of a repository and the AUR. Writing the cache is timed as well, as it
+happens whenever a new pair is compared.
+
+Run from the root of the repository::
+
+    python benchmarks/versionCache.py [--pairs 10000] [--repeat 5]
+
+"""
+
+import argparse
+import os
+import sys
+
+from os import path
+from tempfile import TemporaryDirectory
+from timeit import repeat
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from augur.parser import version, versionCache
+
+
+def buildPairs(count):
+    """
+    Build version pairs in the shapes found in repositories, with epochs,
+    pkgrels, alphanumeric parts and VCS revisions.
+
+    Parameters
+    ----------
+    count : int
+        The number of pairs.
+
+    Returns
+    -------
+    list
+        List of ``(winry, aur)`` version tuples.
+
+    """
+    shapes = ["1.%(i)s.%(j)s-1", "2:%(i)s.%(j)s-2", "%(i)s.%(j)s.r%(i)s.g%(j)x-1", "0.%(i)s.%(j)sbeta1-1",
+              "r%(i)s.%(j)s-3"]
+
+    pairs = []
+    for i in range(count):
+        shape = shapes[i % len(shapes)]
+        pairs.append((shape % {"i": i, "j": i % 7}, shape % {"i": i, "j": i % 7 + i % 2}))
+
+    return pairs
+
+
+def main():
+    argParser = argparse.ArgumentParser(description="Benchmark the version cache against plain vercmp.")
+    argParser.add_argument("--pairs", type=int, default=10000, help="Version pairs compared")
+    argParser.add_argument("--repeat", type=int, default=5, help="Timings taken, the best one is kept")
+    args = argParser.parse_args()
+
+    pairs = buildPairs(args.pairs)
+
+    with TemporaryDirectory() as cacheHome:
+        os.environ["XDG_CACHE_HOME"] = cacheHome
+        os.makedirs(path.join(cacheHome, "augur"))
+
+        cache = versionCache.readVersionCache()
+        expected = versionCache.cachedVercmp(cache, pairs, version.vercmpMany)
+        versionCache.writeVersionCache(cache, args.pairs)
+
+        def cached():
+            return versionCache.cachedVercmp(versionCache.readVersionCache(), pairs, version.vercmpMany)
+
+        assert cached() == expected == version.vercmpMany(pairs)
+
+        timings = [("vercmpMany", lambda: version.vercmpMany(pairs)),
+                   ("read + cachedVercmp", cached),
+                   ("writeVersionCache", lambda: versionCache.writeVersionCache(cache, args.pairs))]
+
+        best = {}
+        for name, run in timings:
+            best[name] = min(repeat(run, number=1, repeat=args.repeat))
+            print("=> %-20s %8.2f ms for %d pairs" % (name, best[name] * 1000, args.pairs))
+
+    ratio = best["vercmpMany"] / best["read + cachedVercmp"]
+    print("=> A warm cache is %(ratio).1fx as fast as comparing again" % locals())
+
+
+if __name__ == "__main__":
+    main()
@@ -22,7 +22,9 @@ from setuptools import setup
 _packages = [
     'augur',
     'augur.configuration',
+    'augur.daemon',
     'augur.display',
+    'augur.network',
     'augur.parser',
     'augur.scraper']
 
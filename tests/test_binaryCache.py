@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+import pytest
+
+from augur.configuration import binaryCache
+
+packages = {"package%04d" % number: "%s.0-1" % number for number in range(0, 2000, 3)}
+packages.update({"ü-unicode": "1:2.0-1", "": "empty", "zzz": ""})
+
+
+def testLookups(tmp_path):
+    cacheFile = str(tmp_path / "packages.cache")
+    binaryCache.writeBinaryCache(packages, cacheFile)
+    cache = binaryCache.BinaryCache(cacheFile)
+
+    assert len(cache) == len(packages)
+    for name, version in packages.items():
+        assert cache[name] == version
+    for name in ("package0001", "package1999", "a", "package", "zzzz", "ü"):
+        assert name not in cache
+        with pytest.raises(KeyError):
+            cache[name]
+    assert list(cache) == sorted(packages, key=lambda name: name.encode("utf-8"))
+    assert dict(cache.items()) == packages
+    cache.close()
+
+
+def testEmptyCache(tmp_path):
+    cacheFile = str(tmp_path / "packages.cache")
+    binaryCache.writeBinaryCache({}, cacheFile)
+    cache = binaryCache.BinaryCache(cacheFile)
+
+    assert len(cache) == 0
+    assert "foo" not in cache
+    cache.close()
+
+
+def testRewriteKeepsOpenCache(tmp_path):
+    cacheFile = str(tmp_path / "packages.cache")
+    binaryCache.writeBinaryCache({"foo": "1.0-1"}, cacheFile)
+    cache = binaryCache.BinaryCache(cacheFile)
+
+    binaryCache.writeBinaryCache({"foo": "2.0-1", "bar": "1.0-1"}, cacheFile)
+
+    assert dict(cache.items()) == {"foo": "1.0-1"}
+    cache.close()
+    cache = binaryCache.BinaryCache(cacheFile)
+    assert dict(cache.items()) == {"foo": "2.0-1", "bar": "1.0-1"}
+    cache.close()
+
+
+def testFailedWriteKeepsCache(monkeypatch, tmp_path):
+    cacheFile = str(tmp_path / "packages.cache")
+    binaryCache.writeBinaryCache({"foo": "1.0-1"}, cacheFile)
+
+    def replace(source, destination):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(binaryCache, "replace", replace)
+    with pytest.raises(OSError):
+        binaryCache.writeBinaryCache({"foo": "2.0-1"}, cacheFile)
+
+    cache = binaryCache.BinaryCache(cacheFile)
+    assert dict(cache.items()) == {"foo": "1.0-1"}
+    cache.close()
+
+
+@pytest.mark.parametrize("content", [b"AUGC", b"AUGC\x01\x00\x00\x00\x05\x00\x00\x00", b"NOPE\x01\x00\x00\x00\x00\x00\x00\x00",
+                                     b"AUGC\x02\x00\x00\x00\x00\x00\x00\x00"])
+def testInvalidCache(tmp_path, content):
+    cacheFile = tmp_path / "packages.cache"
+    cacheFile.write_bytes(content)
+
+    with pytest.raises(ValueError):
+        binaryCache.BinaryCache(str(cacheFile))
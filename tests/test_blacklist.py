@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import re
+import pytest
+
+from augur.configuration import blacklist
+
+
+def testExactGlobAndPin():
+    matcher = blacklist.BlacklistMatcher(["foo", "*-git", "bar<=1.2-1"])
+
+    assert "foo" in matcher
+    assert "neovim-git" in matcher
+    assert "neovim" not in matcher
+    assert matcher.matches("bar", "1.2-1")
+    assert not matcher.matches("bar", "1.3-1")
+    assert "bar" not in matcher
+
+
+def testRegexBackreference():
+    matcher = blacklist.BlacklistMatcher(["*-git", r"re:(\w+)-\1"])
+
+    assert "lib-lib" in matcher
+    assert "lib-foo" not in matcher
+    assert "foo-git" in matcher
+
+
+def testRegexInlineFlag():
+    matcher = blacklist.BlacklistMatcher(["re:(?i)^python-.*$", "re:^Perl-.*$"])
+
+    assert "PYTHON-foo" in matcher
+    assert "Perl-foo" in matcher
+    assert "perl-foo" not in matcher
+
+
+def testInvalidRegex():
+    with pytest.raises(re.error) as e:
+        blacklist.BlacklistMatcher(["re:^python-.*$", "re:(unclosed"])
+
+    assert e.value.pattern == "(unclosed"
+
+
+def testEditBlacklistKeepsOtherKeys(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
+    (tmp_path / "augur").mkdir()
+    (tmp_path / "augur" / "blacklist.yaml").write_text("blacklist:\n- foo\nnotes: kept\n")
+
+    added, removed = blacklist.editBlacklist(add=["bar"], remove=["foo"])
+    document = blacklist.readBlacklist()
+
+    assert (added, removed) == (["bar"], ["foo"])
+    assert document["blacklist"] == ["bar"]
+    assert document["notes"] == "kept"
+    assert "matcher" not in (tmp_path / "augur" / "blacklist.yaml").read_text()
+
+
+def testReadPackageListDropsDuplicates(tmp_path):
+    listFile = tmp_path / "packages"
+    listFile.write_text("foo\n# comment\n\nbar\nfoo\n")
+
+    assert blacklist.readPackageList(["bar", "@%s" % listFile, "baz"]) == ["bar", "foo", "baz"]
+
+
+def testEditBlacklistKeepsOrder(monkeypatch, tmp_path, capsys):
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
+    (tmp_path / "augur").mkdir()
+    (tmp_path / "augur" / "blacklist.yaml").write_text("blacklist:\n- foo\n- bar\n- baz\n")
+
+    added, removed = blacklist.editBlacklist(add=["qux", "foo", "quux", "qux"], remove=["bar", "missing", "quux"])
+
+    assert (added, removed) == (["qux", "quux"], ["bar", "quux"])
+    assert blacklist.readBlacklist()["blacklist"] == ["foo", "baz", "qux"]
+    output = capsys.readouterr().out
+    assert "=> Error! foo already blacklisted." in output
+    assert "=> Error! missing not blacklisted." in output
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+import pytest
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from augur.network import client
+
+
+class Recorder(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get("Proxy-Authorization")))
+        body = b"proxied"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def proxy(monkeypatch):
+    monkeypatch.setattr(Recorder, "requests", [])
+    server = HTTPServer(("127.0.0.1", 0), Recorder)
+    threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True).start()
+
+    yield "127.0.0.1:%s" % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def testHttpProxy(monkeypatch, proxy):
+    monkeypatch.setenv("http_proxy", "http://user:secret@%(proxy)s" % locals())
+    monkeypatch.delenv("no_proxy", raising=False)
+
+    response = client.HttpClient(retries=0).get("http://mirror.example.org/core/core.db")
+
+    assert response.body == b"proxied"
+    assert Recorder.requests == [("http://mirror.example.org/core/core.db", "Basic dXNlcjpzZWNyZXQ=")]
+
+
+def testNoProxy(monkeypatch, proxy):
+    monkeypatch.setenv("http_proxy", "http://proxy.example.org:3128")
+    monkeypatch.setenv("no_proxy", "127.0.0.1")
+
+    response = client.HttpClient(retries=0).get("http://%(proxy)s/core/core.db" % locals())
+
+    assert response.body == b"proxied"
+    assert Recorder.requests == [("/core/core.db", None)]
+
+
+def testGetClientIsShared(monkeypatch):
+    monkeypatch.setattr(client, "_client", None)
+    barrier = threading.Barrier(8)
+    clients = []
+
+    def getClient():
+        barrier.wait()
+        clients.append(client.getClient())
+
+    threads = [threading.Thread(target=getClient) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(map(id, clients))) == 1
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import json
+import pytest
+
+from collections import OrderedDict
+
+from augur.parser import compare, parseRepo, version
+
+
+def testCompareVersionsBatchesComparisons(monkeypatch):
+    calls = []
+
+    def vercmpMany(pairs):
+        calls.append(list(pairs))
+        return [version.vercmp(winry, aur) for winry, aur in pairs]
+
+    monkeypatch.setattr(version, "vercmpMany", vercmpMany)
+
+    winry = parseRepo.PackageIndex({"foo": "1.0-1", "bar": "2.0-1", "python-x": "1:2.0-1", "python2-x": "1:2.0-1"},
+                                   {"python-x": "x", "python2-x": "x"})
+    aur = {"foo": "1.1-1", "bar": "2.0-1", "python-x": "1:1.0-1"}
+    cache = OrderedDict([(("2.0-1", "2.0-1"), 0)])
+
+    records = list(compare.compareVersions(winry, aur, {"blacklist": []}, cache=cache))
+
+    assert [(record["name"], record["direction"]) for record in records] == [("foo", "upgrade"), ("x", "downgrade")]
+    assert records[1]["packages"] == ["python-x", "python2-x"]
+    assert calls == [[("1.0-1", "1.1-1"), ("1:2.0-1", "1:1.0-1")]]
+    assert cache[("1.0-1", "1.1-1")] == -1
+
+
+record = {"repo": "winry-testing", "name": "foo", "packages": ["foo"], "winry": "1.0-1", "aur": "1.1-1",
+          "direction": "upgrade"}
+
+
+def failingRecords():
+    yield record
+    raise ValueError("Comparison failed")
+
+
+@pytest.mark.parametrize("output", ["json", "ndjson"])
+def testWriteRecordsJson(output):
+    file = io.StringIO()
+
+    assert compare.writeRecords(iter([record]), output, file)
+
+    if output == "json":
+        assert json.loads(file.getvalue()) == [record]
+    else:
+        assert [json.loads(line) for line in file.getvalue().splitlines()] == [record]
+
+
+def testWriteRecordsJsonFailure():
+    file = io.StringIO()
+
+    with pytest.raises(ValueError):
+        compare.writeRecords(failingRecords(), "json", file)
+
+    assert file.getvalue() == ""
+
+
+def testWriteRecordsJsonEmpty():
+    file = io.StringIO()
+
+    assert not compare.writeRecords(iter([]), "json", file)
+    assert json.loads(file.getvalue()) == []
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+import os
+import socket
+import socketserver
+import threading
+import pytest
+
+from augur.configuration import binaryCache
+from augur.daemon import client, server
+from augur.parser import parseRepo
+
+
+@pytest.fixture
+def daemon(monkeypatch, tmp_path):
+    (tmp_path / "config" / "augur").mkdir(parents=True)
+    (tmp_path / "cache" / "augur").mkdir(parents=True)
+    (tmp_path / "config" / "augur" / "blacklist.yaml").write_text("blacklist:\n  - bar\n")
+    binaryCache.writeBinaryCache({"foo": "1.1-1", "bar": "3.0-1", "baz": "1.0-1"},
+                                 str(tmp_path / "cache" / "augur" / "packages.cache"))
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+    repos = {"winry-testing": parseRepo.PackageIndex({"foo": "1.0-1", "bar": "2.0-1", "baz": "1.0-1"})}
+    monkeypatch.setattr(server.parseRepo, "parseRepos", lambda *args: dict(repos))
+
+    augurDaemon = server.AugurDaemon({"Mirror": "http://mirror.example.org"})
+    augurDaemon.refresh()
+    return augurDaemon
+
+
+@pytest.fixture
+def socketFile(daemon, tmp_path):
+    socketFile = str(tmp_path / "augur.sock")
+    unixServer = socketserver.ThreadingUnixStreamServer(socketFile, server._RequestHandler)
+    unixServer.daemon = daemon
+    unixServer.daemon_threads = True
+    threading.Thread(target=unixServer.serve_forever, args=(0.01,), daemon=True).start()
+
+    yield socketFile
+    unixServer.shutdown()
+    unixServer.server_close()
+
+
+def testCheck(socketFile):
+    response = client.sendRequest({"command": "check"}, socketFile)
+
+    assert response["ok"]
+    assert [(record["repo"], record["name"], record["winry"], record["aur"], record["direction"])
+            for record in response["changes"]] == [("winry-testing", "foo", "1.0-1", "1.1-1", "upgrade")]
+
+
+def testQuery(socketFile):
+    response = client.sendRequest({"command": "query", "packages": ["bar", "missing"]}, socketFile)
+
+    assert response == {"ok": True, "packages": {
+        "bar": {"aur": "3.0-1", "repos": {"winry-testing": "2.0-1"}, "blacklisted": True},
+        "missing": {"aur": None, "repos": {}, "blacklisted": False}}}
+
+
+def testStatus(socketFile):
+    response = client.sendRequest({"command": "status"}, socketFile)
+
+    assert response["ok"]
+    assert response["repos"] == {"winry-testing": 3}
+    assert response["aur"] == 3
+
+
+def testErrors(socketFile):
+    assert client.sendRequest({"command": "upgrade"}, socketFile) == {"ok": False, "error": "Unknown command 'upgrade'"}
+
+    # Every line is answered on its own, a bad one doesn't end the connection
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(5)
+        connection.connect(socketFile)
+        connection.sendall(b"not json\n{\"command\": \"status\"}\n")
+        with connection.makefile("rb") as file:
+            assert b"Invalid request" in file.readline()
+            assert b"\"ok\": true" in file.readline()
+
+
+def testNotRunning(tmp_path, capsys):
+    with pytest.raises(SystemExit) as e:
+        client.sendRequest({"command": "status"}, str(tmp_path / "missing.sock"))
+
+    assert e.value.code == 1
+    assert "=> Error! The augur daemon is not running" in capsys.readouterr().out
+
+
+def testRefreshKeepsChecksUntilChanged(daemon, tmp_path):
+    changes = daemon.check()
+    daemon.refresh()
+    assert daemon.check() is changes
+
+    cacheFile = str(tmp_path / "cache" / "augur" / "packages.cache")
+    binaryCache.writeBinaryCache({"foo": "1.0-1", "bar": "3.0-1", "baz": "1.1-1"}, cacheFile)
+    os.utime(cacheFile, (1000.0, 1000.0))
+    daemon.refresh()
+
+    assert [record["name"] for record in daemon.check()] == ["baz"]
+
+
+def testSecondDaemonRefused(socketFile, capsys):
+    with pytest.raises(SystemExit) as e:
+        server.serveDaemon({}, socketFile)
+
+    assert e.value.code == 1
+    assert "=> Error! A daemon is already listening" in capsys.readouterr().out
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import runpy
+import sys
+import tarfile
+import threading
+import time
+import pytest
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from augur.configuration import binaryCache, snapshots
+
+script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "augur", "augur")
+
+
+def makeDatabase(packages):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, version in packages.items():
+            desc = ("%%NAME%%\n%(name)s\n\n%%BASE%%\n%(name)s\n\n%%VERSION%%\n%(version)s\n\n" % locals()).encode()
+            member = tarfile.TarInfo("%(name)s-%(version)s/desc" % locals())
+            member.size = len(desc)
+            archive.addfile(member, io.BytesIO(desc))
+    return buffer.getvalue()
+
+
+class Mirror(BaseHTTPRequestHandler):
+    status = 200
+    body = b""
+
+    def do_GET(self):
+        self.send_response(self.status)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def augur(monkeypatch, tmp_path):
+    server = HTTPServer(("127.0.0.1", 0), Mirror)
+    threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True).start()
+
+    configDir = tmp_path / "config" / "augur"
+    cacheDir = tmp_path / "cache" / "augur"
+    configDir.mkdir(parents=True)
+    cacheDir.mkdir(parents=True)
+    (configDir / "configuration.yaml").write_text("Mirror: http://127.0.0.1:%(port)s\nAURUrl: http://127.0.0.1:%(port)s\n"
+                                                  "Retries: 0\nRepos:\n  - Name: winry-testing\n"
+                                                  % {"port": server.server_address[1]})
+    (configDir / "blacklist.yaml").write_text("blacklist: []\n")
+    binaryCache.writeBinaryCache({"foo": "1.1-1", "bar": "2.0-1"}, str(cacheDir / "packages.cache"))
+
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setattr(os, "geteuid", lambda: 1000)
+    monkeypatch.setattr(sys, "stdout", sys.stdout)
+
+    def run(*args, status=200, body=None):
+        monkeypatch.setattr(Mirror, "status", status)
+        monkeypatch.setattr(Mirror, "body", makeDatabase({"foo": "1.0-1", "bar": "2.0-1"}) if body is None else body)
+        monkeypatch.setattr(sys, "argv", [script] + list(args))
+        with pytest.raises(SystemExit) as e:
+            runpy.run_path(script, run_name="__main__")
+        return e.value.code
+
+    yield run
+    server.shutdown()
+    server.server_close()
+
+
+def testCheckWithChanges(augur, capsys):
+    assert augur("--check") == 0
+    assert "Upgrade: foo" in capsys.readouterr().out
+
+
+def testCheckWithoutChanges(augur):
+    assert augur("--check", body=makeDatabase({"foo": "1.1-1", "bar": "2.0-1"})) == 2
+
+
+def testInvalidArguments(augur, capsys):
+    assert augur("--check", "--output", "xml") == 1
+    assert "=> Error!" in capsys.readouterr().err
+
+
+def testMirrorError(augur, capsys):
+    assert augur("--check", status=404, body=b"Not found") == 1
+    assert "=> Error!" in capsys.readouterr().out
+
+
+def testUnreadableDatabase(augur, capsys):
+    assert augur("--check", body=b"\x1f\x8b" + b"\0" * 64) == 1
+    assert "=> Error!" in capsys.readouterr().out
+
+
+def testNoDaemon(augur, tmp_path, capsys):
+    assert augur("--check", "--remote", "--socket", str(tmp_path / "missing.sock")) == 1
+    assert "=> Error!" in capsys.readouterr().out
+
+
+def testUpdateMirrorError(augur, tmp_path, capsys):
+    (tmp_path / "cache" / "augur" / "scrape.yaml").write_text("Updated: 1500000000.0\n")
+
+    assert augur("--update", "--incremental", status=404, body=b"Not found") == 1
+    assert "=> Error!" in capsys.readouterr().out
+
+
+def testCheckAgainstSnapshot(augur, tmp_path, capsys):
+    snapshots.recordSnapshot({"foo": "1.2-1", "bar": "2.0-1"}, str(tmp_path / "cache" / "augur" / "snapshots"),
+                             time.time() - 2 * 3600)
+
+    assert augur("--check", "--snapshot", "1") == 0
+    assert "1.2-1" in capsys.readouterr().out
+
+
+def testCheckWithoutSnapshot(augur, capsys):
+    assert augur("--check", "--snapshot", "1") == 1
+    assert "=> Error! No AUR snapshot" in capsys.readouterr().out
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+
+from augur.configuration import binaryCache, history
+
+
+def testOpenHistoryCreatesDirectory(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+    history.openHistory().close()
+
+    assert (tmp_path / "cache" / "augur" / "history.sqlite").is_file()
+
+
+def testRecordChangesSkipsUnchanged(tmp_path):
+    connection = history.openHistory(str(tmp_path / "history.sqlite"))
+
+    first = history.recordChanges(connection, "winry-testing", {"foo": "1.0-1"}, 100.0)
+    same = history.recordChanges(connection, "winry-testing", {"foo": "1.0-1"}, 200.0)
+    changed = history.recordChanges(connection, "winry-testing", {"foo": "1.1-1"}, 300.0)
+
+    assert same == first
+    assert changed != first
+    assert connection.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0] == 2
+
+
+def testCheckVersionsJoinsSnapshots(tmp_path):
+    connection = history.openHistory(str(tmp_path / "history.sqlite"))
+    history.recordSnapshot(connection, "aur", {"foo": "0.9-1", "bar": "2.0-1"}, 100.0)
+    history.recordSnapshot(connection, "aur", {"foo": "1.0-1", "bar": "2.1-1"}, 200.0)
+    history.recordSnapshot(connection, "winry-testing", {"foo": "1.0-1", "bar": "2.0-1", "baz": "1.0-1"}, 100.0)
+
+    assert history.checkVersions(connection, "winry-testing") == [("bar", "2.0-1", "2.1-1")]
+
+
+def testRecordCacheOnlyWhenNewer(tmp_path):
+    connection = history.openHistory(str(tmp_path / "history.sqlite"))
+    cacheFile = tmp_path / "packages.cache"
+    binaryCache.writeBinaryCache({"foo": "1.0-1"}, str(cacheFile))
+    os.utime(str(cacheFile), (1000.0, 1000.0))
+
+    history.recordSnapshot(connection, "aur", {"foo": "0.9-1"}, 500.0)
+    assert history.recordCache(connection, str(cacheFile), {"foo": "1.0-1"}) is not None
+    assert history.recordCache(connection, str(cacheFile), {"foo": "1.0-1"}) is None
+
+
+def testImportCache(tmp_path, capsys):
+    connection = history.openHistory(str(tmp_path / "history.sqlite"))
+    cacheFile = tmp_path / "packages.cache"
+    binaryCache.writeBinaryCache({"foo": "1.0-1"}, str(cacheFile))
+
+    assert history.importCache(connection, str(cacheFile)) is not None
+    assert history.importCache(connection, str(tmp_path / "missing.cache")) is None
+    assert "=> Error!" in capsys.readouterr().out
+
+
+def testPruneHistoryKeepsBaseline(tmp_path):
+    connection = history.openHistory(str(tmp_path / "history.sqlite"))
+    for taken in (100.0, 200.0, 300.0, 400.0):
+        history.recordSnapshot(connection, "aur", {"foo": "%d-1" % taken}, taken)
+    history.recordSnapshot(connection, "winry-testing", {"foo": "1-1"}, 100.0)
+
+    assert history.pruneHistory(connection, 250.0) == 1
+
+    taken = connection.execute("SELECT source, taken FROM snapshots ORDER BY source, taken").fetchall()
+    assert taken == [("aur", 200.0), ("aur", 300.0), ("aur", 400.0), ("winry-testing", 100.0)]
+    assert connection.execute("SELECT COUNT(*) FROM versions").fetchone()[0] == 4
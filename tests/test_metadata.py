@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+import gzip
+import io
+import json
+import pytest
+
+from augur.configuration import binaryCache
+from augur.scraper import metadata
+
+packages = [{"Name": "foo", "Version": "1.0-1", "Description": "Brackets ] and braces } in text"},
+            {"Name": "bar", "Version": "2:0.1-3"},
+            {"Name": "baz", "Version": None}]
+
+
+@pytest.mark.parametrize("chunkSize", [1, 7, 65536])
+def testIterMetadataAcrossChunks(chunkSize):
+    text = io.StringIO(json.dumps(packages, indent=1))
+
+    assert list(metadata.iterMetadata(text, chunkSize)) == packages
+
+
+def testIterMetadataEmptyArray():
+    assert list(metadata.iterMetadata(io.StringIO(" [ ] "))) == []
+
+
+def testIterMetadataNotAnArray():
+    with pytest.raises(ValueError):
+        list(metadata.iterMetadata(io.StringIO('{"Name": "foo"}')))
+
+
+def testIterMetadataTruncated():
+    text = io.StringIO(json.dumps(packages)[:-20])
+
+    with pytest.raises(ValueError):
+        list(metadata.iterMetadata(text, 16))
+
+
+def testFetchMetadataFromGzip(tmp_path):
+    archive = tmp_path / "packages-meta-v1.json.gz"
+    with gzip.open(str(archive), "wt", encoding="utf-8") as file:
+        json.dump(packages, file)
+    cacheFile = tmp_path / "packages.cache"
+
+    assert metadata.fetchMetadata("file://%s" % archive, str(cacheFile))
+
+    cache = binaryCache.BinaryCache(str(cacheFile))
+    assert dict(cache) == {"foo": "1.0-1", "bar": "2:0.1-3"}
+    cache.close()
+    assert (tmp_path / "scrape.yaml").is_file()
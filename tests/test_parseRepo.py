@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import bz2
+import gzip
+import io
+import lzma
+import tarfile
+import threading
+import pytest
+
+from augur.parser import parseRepo
+
+
+def makeArchive(packages, format=tarfile.GNU_FORMAT):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w", format=format) as archive:
+        for name, version, base in packages:
+            directory = tarfile.TarInfo("%(name)s-%(version)s" % locals())
+            directory.type = tarfile.DIRTYPE
+            archive.addfile(directory)
+
+            desc = ("%%NAME%%\n%(name)s\n\n%%BASE%%\n%(base)s\n\n%%VERSION%%\n%(version)s\n\n" % locals()).encode()
+            member = tarfile.TarInfo("%(name)s-%(version)s/desc" % locals())
+            member.size = len(desc)
+            archive.addfile(member, io.BytesIO(desc))
+    return buffer.getvalue()
+
+
+def readPackages(data):
+    return sorted(parseRepo.readDatabase(io.BytesIO(data)))
+
+
+packages = [("foo", "1.0-1", "foo"), ("python-x", "1:2.0-1", "x"), ("python2-x", "1:2.0-1", "x")]
+
+
+@pytest.mark.parametrize("compress", [lambda data: data, gzip.compress, lzma.compress, bz2.compress])
+def testReadDatabase(compress):
+    assert readPackages(compress(makeArchive(packages))) == sorted(packages)
+
+
+@pytest.mark.parametrize("format", [tarfile.GNU_FORMAT, tarfile.PAX_FORMAT, tarfile.USTAR_FORMAT])
+def testLongNames(format):
+    longPackages = [("python-" + "a" * 120, "1.0-1", "a" * 30), ("b" * 90, "2.0-1", "b")]
+
+    assert readPackages(makeArchive(longPackages, format)) == sorted(longPackages)
+
+
+def testZstdNotSupported():
+    with pytest.raises(ValueError):
+        readPackages(b"\x28\xb5\x2f\xfd" + b"\0" * 64)
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, lzma.compress, bz2.compress])
+def testTruncatedCompression(compress):
+    data = compress(makeArchive(packages))
+
+    with pytest.raises(ValueError):
+        readPackages(data[:len(data) // 2])
+
+
+def testTruncatedMember():
+    data = makeArchive(packages)
+
+    # Cut into the desc file of the last package
+    with pytest.raises(ValueError):
+        readPackages(data[:data.rindex(b"%VERSION%")])
+
+
+def testMissingEndOfArchive():
+    data = makeArchive(packages).rstrip(b"\0")
+    data += b"\0" * (-len(data) % 512)
+
+    with pytest.raises(ValueError):
+        readPackages(data)
+
+
+def testEmptyDatabase():
+    with pytest.raises(ValueError):
+        readPackages(b"")
+
+
+def testTruncatedDatabaseNotIndexed(monkeypatch, tmp_path):
+    databaseFile = tmp_path / "winry-testing.db"
+    data = gzip.compress(makeArchive(packages))
+    databaseFile.write_bytes(data[:len(data) // 2])
+    monkeypatch.setattr(parseRepo, "downloadDatabase", lambda *args: str(databaseFile))
+
+    with pytest.raises(SystemExit):
+        parseRepo.parsePackages("http://mirror.example.org")
+
+    assert not (tmp_path / "winry-testing.db.index").exists()
+
+
+def testDatabaseUrlNeedsArch():
+    assert parseRepo.databaseUrl("https://mirror", "core", "x86_64", "%(repo)s/os/%(arch)s/%(repo)s.db") == \
+        "https://mirror/core/os/x86_64/core.db"
+
+    with pytest.raises(ValueError):
+        parseRepo.databaseUrl("https://mirror", "core", "x86_64", "%(repo)s/%(repo)s.db")
+
+
+def testParseReposPrintsInOrder(monkeypatch, capsys):
+    finished = {"b": threading.Event()}
+
+    def parsePackages(mirror, stream, repo, arch, repoPath):
+        parseRepo._print("=> %(repo)s started" % locals())
+        if repo == "a":
+            # Finish after b, so its messages would come last if they weren't held
+            finished["b"].wait(5)
+        parseRepo._print("=> %(repo)s done" % locals())
+        if repo == "b":
+            finished["b"].set()
+        return parseRepo.PackageIndex({repo: "1.0-1"})
+
+    monkeypatch.setattr(parseRepo, "parsePackages", parsePackages)
+
+    repos = parseRepo.parseRepos("https://mirror", [{"Name": "a"}, {"Name": "b"}])
+
+    assert repos == {"a": {"a": "1.0-1"}, "b": {"b": "1.0-1"}}
+    assert capsys.readouterr().out.splitlines() == ["=> a started", "=> a done", "=> b started", "=> b done"]
+
+
+def testStartReposRunsInBackground(monkeypatch, capsys):
+    started = threading.Event()
+
+    def parsePackages(mirror, stream, repo, arch, repoPath):
+        parseRepo._print("=> %(repo)s parsed" % locals())
+        started.wait(5)
+        return parseRepo.PackageIndex({repo: "1.0-1"})
+
+    monkeypatch.setattr(parseRepo, "parsePackages", parsePackages)
+
+    repoJobs = parseRepo.startRepos("https://mirror", [{"Name": "a"}])
+    print("=> Loading AUR packages from cache")
+    started.set()
+
+    assert repoJobs.result() == {"a": {"a": "1.0-1"}}
+    assert capsys.readouterr().out.splitlines() == ["=> Loading AUR packages from cache", "=> a parsed"]
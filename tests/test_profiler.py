@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+from augur.display import profiler
+
+
+def makeProfile(spans):
+    return {"time": 1500000000.0, "seconds": 1.0, "peakRss": 2 ** 20, "counters": {}, "histograms": [],
+            "spans": [{"name": name, "start": 0.0, "seconds": seconds, "peakRss": 2 ** 20}
+                      for name, seconds in spans]}
+
+
+def metricLines(text):
+    return [line for line in text.splitlines() if not line.startswith("#")]
+
+
+def testPrometheusSumsRepeatedSpans():
+    text = profiler.formatPrometheus(makeProfile([("readVersionCache", 0.25), ("compare", 1.0),
+                                                  ("readVersionCache", 0.5), ("readVersionCache", 0.25)]))
+    lines = metricLines(text)
+
+    assert "augur_phase_seconds{phase=\"readVersionCache\"} 1.0" in lines
+    assert "augur_phase_count{phase=\"readVersionCache\"} 3" in lines
+    assert "augur_phase_seconds{phase=\"compare\"} 1.0" in lines
+    assert "augur_phase_count{phase=\"compare\"} 1" in lines
+
+
+def testPrometheusHasNoDuplicateSeries():
+    text = profiler.formatPrometheus(makeProfile([("repos", 0.1), ("repos", 0.2), ("load", 0.3)]))
+    series = [line.rsplit(" ", 1)[0] for line in metricLines(text)]
+
+    assert len(series) == len(set(series))
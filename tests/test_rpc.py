@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+import json
+
+from urllib.parse import parse_qs, urlsplit
+
+from augur.configuration import binaryCache
+from augur.scraper import rpc
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+
+class FakeRpc:
+    def __init__(self, aur, error=None):
+        self.aur = aur
+        self.error = error
+        self.queries = []
+
+    def get(self, url):
+        query = parse_qs(urlsplit(url).query)
+        self.queries.append(query["arg[]"])
+
+        if self.error:
+            response = {"type": "error", "error": self.error}
+        else:
+            response = {"type": "multiinfo", "results": [{"Name": name, "Version": self.aur[name]}
+                                                         for name in query["arg[]"] if name in self.aur]}
+        return FakeResponse(json.dumps(response).encode())
+
+
+def testFetchInfoBatches(monkeypatch, tmp_path):
+    names = ["package%03d" % number for number in range(7)]
+    http = FakeRpc({name: "1.0-1" for name in names[1:]})
+    monkeypatch.setattr(rpc.client, "getClient", lambda: http)
+    cacheFile = tmp_path / "packages.cache"
+
+    assert rpc.fetchInfo("https://aur.example.org/rpc/", names + names[:2], str(cacheFile), 3)
+
+    assert http.queries == [names[0:3], names[3:6], names[6:7]]
+    cache = binaryCache.BinaryCache(str(cacheFile))
+    assert dict(cache) == {name: "1.0-1" for name in names[1:]}
+    cache.close()
+
+
+def testFetchInfoError(monkeypatch, tmp_path, capsys):
+    http = FakeRpc({}, "Too many package information requests.")
+    monkeypatch.setattr(rpc.client, "getClient", lambda: http)
+    cacheFile = tmp_path / "packages.cache"
+
+    assert not rpc.fetchInfo("https://aur.example.org/rpc/", ["foo", "bar"], str(cacheFile))
+
+    assert "=> Error! AUR RPC query failed: Too many package information requests." in capsys.readouterr().out
+    assert not cacheFile.exists()
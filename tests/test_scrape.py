@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import re
+import pytest
+
+from threading import Thread
+from time import gmtime, monotonic, sleep, strftime
+
+from augur.configuration import binaryCache
+from augur.scraper import results, scrape
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+
+class FakeClient:
+    def __init__(self, parserErrors):
+        self.parserErrors = parserErrors
+        self.fetched = []
+
+    def get(self, url):
+        page = int(re.search(r"O=(\d+)", url).group(1)) // 250 + 1
+        self.fetched.append(page)
+
+        # Hold page 3 back until the parser has given up on page 2
+        if page == 3:
+            deadline = monotonic() + 5
+            while not (self.parserErrors and self.parserErrors[0]) and monotonic() < deadline:
+                sleep(0.001)
+
+        return FakeResponse(("page %(page)s" % locals()).encode())
+
+
+def testScrapeStopsAfterParseError(monkeypatch, tmp_path):
+    parserErrors = []
+
+    def thread(target, args):
+        parserErrors.append(args[2])
+        return Thread(target=target, args=args)
+
+    def parsePage(page):
+        if page == b"page 2":
+            raise ValueError("Unparsable page")
+        return {}
+
+    http = FakeClient(parserErrors)
+    monkeypatch.setattr(scrape.client, "getClient", lambda: http)
+    monkeypatch.setattr(scrape, "Thread", thread)
+    monkeypatch.setattr(scrape, "parsePageCount", lambda page: 10)
+    monkeypatch.setattr(scrape, "parsePage", parsePage)
+
+    with pytest.raises(ValueError):
+        scrape.scrapeAur("https://aur.example.org", str(tmp_path / "packages.cache"))
+
+    assert http.fetched == [1, 2, 3]
+
+
+resultsPage = b"""<div id="pkglist-results" class="box">
+<div class="pkglist-stats"><p>2 packages found. Page 1 of 1.</p></div>
+<table class="results">
+<thead><tr><th>Name</th><th>Version</th><th>Votes</th></tr></thead>
+<tbody>
+<tr class="odd"><td><a href="/packages/foo/">foo</a></td><td>1.0-1</td><td>3</td></tr>
+<tr class="even"><td><a href="/packages/bar/">bar&amp;baz</a></td><td>2:2.0-1</td><td>0</td></tr>
+</tbody>
+</table>
+</div>"""
+
+
+def testExtractPackages():
+    assert results.extractPackages(resultsPage) == {"foo": "1.0-1", "bar&baz": "2:2.0-1"}
+
+
+def testExtractPackagesWithoutTable():
+    with pytest.raises(ValueError):
+        results.extractPackages(b"<html><body><h1>503 Service Unavailable</h1></body></html>")
+
+
+def updatedPage(rows):
+    cells = "".join("<tr><td><a href=\"/packages/%s/\">%s</a></td><td>%s</td><td>%s (UTC)</td></tr>"
+                    % (name, name, version, strftime("%Y-%m-%d %H:%M", gmtime(updated)))
+                    for name, version, updated in rows)
+    return ("<table class=\"results\"><thead><tr><th>Name</th><th>Version</th><th>Last Updated</th></tr></thead>"
+            "<tbody>%(cells)s</tbody></table>" % locals()).encode()
+
+
+class PagedClient:
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+
+    def get(self, url):
+        page = int(re.search(r"O=(\d+)", url).group(1)) // 2
+        self.fetched.append(page + 1)
+        return FakeResponse(updatedPage(self.pages[page]))
+
+
+def testTimestampRoundTrip(tmp_path):
+    cacheFile = str(tmp_path / "packages.cache")
+
+    assert scrape.readTimestamp(cacheFile) is None
+    assert scrape.writeTimestamp(cacheFile, 1500000000.5)
+    assert scrape.readTimestamp(cacheFile) == 1500000000.5
+
+
+def testParseUpdated():
+    assert scrape.parseUpdated(" 2017-07-14 02:40 (UTC)") == 1500000000.0
+
+
+def testScrapeIncrementalStopsAtLastUpdate(monkeypatch, tmp_path):
+    cacheFile = str(tmp_path / "packages.cache")
+    binaryCache.writeBinaryCache({"foo": "0.9-1", "old": "1.0-1"}, cacheFile)
+    scrape.writeTimestamp(cacheFile, 1500000000.0)
+
+    http = PagedClient([[("foo", "1.0-1", 1500000600), ("new", "0.1-1", 1500000300)],
+                        [("same", "2.0-1", 1500000000), ("stale", "3.0-1", 1499990000)],
+                        [("older", "4.0-1", 1499900000)]])
+    monkeypatch.setattr(scrape.client, "getClient", lambda: http)
+
+    assert scrape.scrapeIncremental("https://aur.example.org", cacheFile, 2)
+
+    assert http.fetched == [1, 2]
+    cache = binaryCache.BinaryCache(cacheFile)
+    assert dict(cache) == {"foo": "1.0-1", "new": "0.1-1", "same": "2.0-1", "old": "1.0-1"}
+    cache.close()
+    assert scrape.readTimestamp(cacheFile) > 1500000000.0
+
+
+def testScrapeIncrementalNeedsFullUpdate(monkeypatch, tmp_path, capsys):
+    cacheFile = str(tmp_path / "packages.cache")
+    binaryCache.writeBinaryCache({"foo": "0.9-1"}, cacheFile)
+    monkeypatch.setattr(scrape.client, "getClient", lambda: PagedClient([]))
+
+    assert not scrape.scrapeIncremental("https://aur.example.org", cacheFile, 2)
+    assert "Please do a full update first" in capsys.readouterr().out
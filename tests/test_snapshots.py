@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+import os
+
+from augur.configuration import snapshots
+
+day = 86400.0
+now = 1500000000.0
+
+
+def testRoundTripThroughDeltas(tmp_path):
+    snapshotDir = str(tmp_path / "snapshots")
+    states = [{"foo": "1.0-1", "bar": "2.0-1"},
+              {"foo": "1.1-1", "bar": "2.0-1", "baz": "0.1-1"},
+              {"foo": "1.1-1", "baz": "0.2-1"},
+              {"foo": "1.2-1", "baz": "0.2-1", "bar": "3.0-1"}]
+
+    for number, packages in enumerate(states):
+        snapshots.recordSnapshot(packages, snapshotDir, now + number * day, rebase=2, keepDays=365 * 100)
+
+    kinds = [kind for taken, kind, snapshotFile in snapshots.listSnapshots(snapshotDir)]
+    assert kinds == ["base", "delta", "delta", "base"]
+    for number, packages in enumerate(states):
+        assert snapshots.readSnapshot(snapshotDir, now + number * day + 1) == packages
+    assert snapshots.readSnapshot(snapshotDir) == states[-1]
+    assert snapshots.readSnapshot(snapshotDir, now - 1) is None
+
+
+def testPruneKeepsBaseOfKeptDeltas(tmp_path):
+    snapshotDir = str(tmp_path / "snapshots")
+    for number in range(4):
+        snapshots.recordSnapshot({"foo": "1.%s-1" % number}, snapshotDir, now + number * day, rebase=10,
+                                 keepDays=365 * 100)
+
+    snapshots.pruneSnapshots(snapshotDir, now + 2.5 * day)
+
+    assert len(snapshots.listSnapshots(snapshotDir)) == 4
+    assert snapshots.readSnapshot(snapshotDir, now + 3 * day) == {"foo": "1.3-1"}
+
+
+def testNoTemporaryFilesLeft(tmp_path):
+    snapshotDir = str(tmp_path / "snapshots")
+    snapshots.recordSnapshot({"foo": "1.0-1"}, snapshotDir, now)
+    snapshots.recordSnapshot({"foo": "1.1-1"}, snapshotDir, now + day)
+
+    assert not [name for name in os.listdir(snapshotDir) if name.endswith(".tmp")]
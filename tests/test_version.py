@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+#   This file is part of Augur - <http://github.com/winry-linux/augur>
+#
+#   Copyright 2017, Joshua Strot <joshua@winrylinux.org>
+#
+#   Augur is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Augur is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with Augur. If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+
+from augur.parser import version
+
+# The cases of pacman's test/util/vercmptest.sh, every one is also checked the
+# other way around
+vercmpCases = [
+    # All similar length, no pkgrel
+    ("1.5.0", "1.5.0", 0),
+    ("1.5.1", "1.5.0", 1),
+
+    # Mixed length
+    ("1.5.1", "1.5", 1),
+
+    # With pkgrel, simple
+    ("1.5.0-1", "1.5.0-1", 0),
+    ("1.5.0-1", "1.5.0-2", -1),
+    ("1.5.0-1", "1.5.1-1", -1),
+    ("1.5.0-2", "1.5.1-1", -1),
+
+    # With pkgrel, mixed lengths
+    ("1.5-1", "1.5.1-1", -1),
+    ("1.5-2", "1.5.1-1", -1),
+    ("1.5-2", "1.5.1-2", -1),
+
+    # Mixed pkgrel inclusion
+    ("1.5", "1.5-1", 0),
+    ("1.5-1", "1.5", 0),
+    ("1.1-1", "1.1", 0),
+    ("1.0-1", "1.1", -1),
+    ("1.1-1", "1.0", 1),
+
+    # Alphanumeric versions
+    ("1.5b-1", "1.5-1", -1),
+    ("1.5b", "1.5", -1),
+    ("1.5b-1", "1.5", -1),
+    ("1.5b", "1.5.1", -1),
+
+    # From the manpage
+    ("1.0a", "1.0alpha", -1),
+    ("1.0alpha", "1.0b", -1),
+    ("1.0b", "1.0beta", -1),
+    ("1.0beta", "1.0rc", -1),
+    ("1.0rc", "1.0", -1),
+
+    # Alpha dotted versions
+    ("1.5.a", "1.5", 1),
+    ("1.5.b", "1.5.a", 1),
+    ("1.5.1", "1.5.b", 1),
+
+    # Alpha dots and dashes
+    ("1.5.b-1", "1.5.b", 0),
+    ("1.5-1", "1.5.b", -1),
+
+    # Same or similar content, differing separators
+    ("2.0", "2_0", 0),
+    ("2.0_a", "2_0.a", 0),
+    ("2.0a", "2.0.a", -1),
+    ("2___a", "2_a", 1),
+    ("1~0", "1.0", 0),
+    ("1.0~rc1", "1.0.rc1", 0),
+
+    # Epochs
+    ("0:1.0", "0:1.0", 0),
+    ("0:1.0", "0:1.1", -1),
+    ("1:1.0", "0:1.0", 1),
+    ("1:1.0", "0:1.1", 1),
+    ("1:1.0", "2:1.1", -1),
+
+    # Epochs with a pkgrel on some of the versions
+    ("1:1.0", "0:1.0-1", 1),
+    ("1:1.0-1", "0:1.1-1", 1),
+
+    # An epoch on only one of the versions
+    ("0:1.0", "1.0", 0),
+    ("0:1.0", "1.1", -1),
+    ("0:1.1", "1.0", 1),
+    ("1:1.0", "1.0", 1),
+    ("1:1.0", "1.1", 1),
+    ("1:1.1", "1.1", 1),
+
+    # Leading zeros
+    ("1.01", "1.1", 0),
+    ("1.001", "1.1", 0),
+    ("01.0", "1.0", 0),
+    ("1.010", "1.9", 1),
+]
+
+
+@pytest.mark.parametrize("one, two, result", vercmpCases)
+def testVercmp(one, two, result):
+    assert version.vercmp(one, two) == result
+    assert version.vercmp(two, one) == -result
+
+
+def testVercmpMany():
+    pairs = [(one, two) for one, two, result in vercmpCases]
+
+    assert version.vercmpMany(pairs + pairs) == [result for one, two, result in vercmpCases] * 2